@@ -0,0 +1 @@
+"""Mock endpoints and throughput benchmarks for Genshin Auto Daily"""
@@ -0,0 +1,259 @@
+"""Local stand-in for the HoYoLAB, Fandom wiki and Discord endpoints."""
+import argparse
+import json
+import random
+import threading
+import time
+import zlib
+from collections import Counter
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Set, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+
+@dataclass
+class MockConfig:
+    latency: float = 0.0  # seconds added to every response
+    latency_jitter: float = 0.0  # uniform extra latency, in seconds
+    error_rate: float = 0.0  # probability of answering with HTTP 503
+    rate_limit_rate: float = 0.0  # probability of answering cdkey calls with -2016
+    rate_limit_wait: int = 1  # seconds quoted in the -2016 message
+    code_count: int = 5  # active codes listed on the wiki page
+    task_count: int = 4  # Mimo tasks per account
+    seed: Optional[int] = None
+
+
+class MockState:
+    def __init__(self, config: MockConfig):
+        self.config = config
+        self.random = random.Random(config.seed)
+        self.lock = threading.Lock()
+        self.signed: Set[Tuple[str, str]] = set()  # (cookie, act_id)
+        self.redeemed: Set[Tuple[str, str]] = set()
+        self.tasks: Dict[str, Dict[int, int]] = {}
+        self.requests: Counter = Counter()
+
+    def roll(self, probability: float) -> bool:
+        with self.lock:
+            return probability > 0 and self.random.random() < probability
+
+    def account_tasks(self, cookie: str) -> Dict[int, int]:
+        # task_id -> status (1: completed, 2: not completed, 3: received)
+        return self.tasks.setdefault(cookie, {task_id: 2 for task_id in range(1, self.config.task_count + 1)})
+
+
+def build_wikitext(code_count: int) -> str:
+    rows = "\n".join(
+        f"{{{{Code Row|MOCKCODE{index:04d}|G|Primogem ×{60 + index}; Mora ×10,000|2024-01-01|{index + 1} days}}}}"
+        for index in range(code_count)
+    )
+    return f"==Active Codes==\n{rows}\n==Inactive Codes==\n"
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    server: 'MockServer'
+
+    def do_GET(self):
+        self._dispatch()
+
+    def do_POST(self):
+        self._dispatch()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _dispatch(self):
+        state = self.server.state
+        config = state.config
+        parts = urlsplit(self.path)
+        query = {key: values[0] for key, values in parse_qs(parts.query).items()}
+        body = self._read_body()
+
+        endpoint = parts.path.rsplit('/', 1)[-1] if not parts.path.startswith('/api/webhooks') else 'webhook'
+        with state.lock:
+            state.requests[endpoint] += 1
+
+        delay = config.latency + (state.random.uniform(0, config.latency_jitter) if config.latency_jitter else 0)
+        if delay:
+            time.sleep(delay)
+
+        if state.roll(config.error_rate):
+            self._send(503, {'message': 'Service Unavailable'})
+            return
+
+        handler = _ROUTES.get(endpoint)
+        if handler is None:
+            self._send(404, {'message': f'No mock for {parts.path}'})
+            return
+        status, payload = handler(state, query, body, self.headers.get('Cookie', ''))
+        self._send(status, payload)
+
+    def _read_body(self) -> dict:
+        length = int(self.headers.get('Content-Length') or 0)
+        if not length:
+            return {}
+        try:
+            return json.loads(self.rfile.read(length))
+        except ValueError:
+            return {}
+
+    def _send(self, status: int, payload):
+        data = b'' if payload is None else json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def _ok(data=None) -> Tuple[int, dict]:
+    return 200, {'retcode': 0, 'message': 'OK', 'data': data}
+
+
+def _sign(state: MockState, query, body, cookie):
+    key = (cookie, str(body.get('act_id', '')))
+    with state.lock:
+        if key in state.signed:
+            return 200, {'retcode': -5003, 'message': "Traveler, you've already checked in today~", 'data': None}
+        state.signed.add(key)
+    return _ok({'code': 'ok'})
+
+
+def _sign_home(state: MockState, query, body, cookie):
+    awards = [{'icon': '', 'name': 'Primogem' if day % 2 else 'Mora', 'cnt': 20 if day % 2 else 5000}
+              for day in range(1, 31)]
+    return _ok({'month': time.localtime().tm_mon, 'awards': awards})
+
+
+def _sign_info(state: MockState, query, body, cookie):
+    with state.lock:
+        signed = (cookie, query.get('act_id', '')) in state.signed
+    return _ok({'total_sign_day': int(signed), 'today': time.strftime('%Y-%m-%d'), 'is_sign': signed})
+
+
+def _cdkey(state: MockState, query, body, cookie):
+    if state.roll(state.config.rate_limit_rate):
+        wait = state.config.rate_limit_wait
+        return 200, {'retcode': -2016, 'message': f'Redemption in cooldown, please try again in {wait} seconds.'}
+    key = (query.get('uid', ''), query.get('cdkey', ''))
+    with state.lock:
+        if key in state.redeemed:
+            return 200, {'retcode': -2017, 'message': 'This Redemption Code is already in use'}
+        state.redeemed.add(key)
+    return 200, {'retcode': 0, 'message': 'Redeemed successfully'}
+
+
+def _game_record(state: MockState, query, body, cookie):
+    return _ok({'role': {'nickname': 'Traveler', 'level': 60, 'region': query.get('server', 'os_asia'),
+                         'game_head_icon': ''}})
+
+
+def _game_roles(state: MockState, query, body, cookie):
+    # Every cookie owns one Asia role; cookies mentioning "multi" also own a Europe one.
+    uid = 800000000 + zlib.crc32(cookie.encode('utf-8')) % 100000000
+    roles = [{'game_biz': query.get('game_biz', ''), 'game_uid': str(uid), 'region': 'os_asia',
+              'nickname': 'Traveler', 'level': 60, 'is_chosen': True}]
+    if 'multi' in cookie:
+        roles.append({'game_biz': query.get('game_biz', ''), 'game_uid': str(uid + 1), 'region': 'os_euro',
+                      'nickname': 'Traveler', 'level': 45, 'is_chosen': False})
+    return _ok({'list': roles})
+
+
+def _task_list(state: MockState, query, body, cookie):
+    with state.lock:
+        tasks = state.account_tasks(cookie)
+        task_list = [{'task_id': task_id, 'task_name': f'Mock task {task_id}', 'point': 10, 'status': status}
+                     for task_id, status in tasks.items()]
+    return _ok({'task_list': task_list})
+
+
+def _finish_task(state: MockState, query, body, cookie):
+    with state.lock:
+        tasks = state.account_tasks(cookie)
+        if tasks.get(body.get('task_id')) == 2:
+            tasks[body['task_id']] = 1
+    return _ok()
+
+
+def _receive_point(state: MockState, query, body, cookie):
+    task_id = int(query.get('task_id', 0))
+    with state.lock:
+        tasks = state.account_tasks(cookie)
+        if tasks.get(task_id) == 1:
+            tasks[task_id] = 3
+    return _ok()
+
+
+def _wiki(state: MockState, query, body, cookie):
+    return 200, {'parse': {'wikitext': {'*': build_wikitext(state.config.code_count)}}}
+
+
+def _webhook(state: MockState, query, body, cookie):
+    return 204, None
+
+
+_ROUTES = {
+    'sign': _sign,
+    'home': _sign_home,
+    'info': _sign_info,
+    'webExchangeCdkey': _cdkey,
+    'index': _game_record,
+    'getUserGameRolesByCookie': _game_roles,
+    'task_list': _task_list,
+    'finish_task': _finish_task,
+    'receive_point': _receive_point,
+    'api.php': _wiki,
+    'webhook': _webhook,
+}
+
+
+class MockServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, config: MockConfig, host: str = '127.0.0.1', port: int = 0):
+        super().__init__((host, port), MockHandler)
+        self.state = MockState(config)
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> 'MockServer':
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve mock HoYoLAB, wiki and Discord endpoints")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--latency-jitter', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0)
+    parser.add_argument('--rate-limit-wait', type=int, default=1)
+    parser.add_argument('--codes', type=int, default=5)
+    parser.add_argument('--tasks', type=int, default=4)
+    args = parser.parse_args()
+
+    config = MockConfig(args.latency, args.latency_jitter, args.error_rate, args.rate_limit_rate,
+                        args.rate_limit_wait, args.codes, args.tasks)
+    server = MockServer(config, port=args.port)
+    print(f"Mock server listening on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
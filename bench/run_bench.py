@@ -0,0 +1,141 @@
+"""End-to-end throughput benchmark against the local mock server."""
+import argparse
+import io
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import redirect_stdout
+from typing import Callable, Dict, List
+
+from bench.mock_server import MockConfig, MockServer
+from utils import http_client, paths, state
+from utils.constants import CHECKIN_API_URL, CHECKIN_HEADERS, DAILY_CHECKIN_ACT_ID, DEFAULT_HEADERS
+
+
+class Account:
+    __slots__ = ('uid', 'region', 'cookie')
+
+    def __init__(self, index: int):
+        self.uid = str(800000000 + index)
+        self.region = 'os_asia'
+        self.cookie = f"ltuid_v2={index}; ltoken_v2=mock{index}; account_id_v2={index}"
+
+
+def flow_checkin(account: Account, context: dict) -> None:
+    from checkin.daily import checkin
+
+    checkin(CHECKIN_API_URL, {"act_id": DAILY_CHECKIN_ACT_ID}, {**CHECKIN_HEADERS, "Cookie": account.cookie})
+
+
+def flow_redeem(account: Account, context: dict) -> None:
+    from redeem.redeem_code import redeem_multiple_codes
+
+    redeem_multiple_codes(account.uid, account.region, account.cookie, context['codes'],
+                          interval=context['redeem_interval'])
+
+
+def flow_mimo(account: Account, context: dict) -> None:
+    from mimotravel import nata_autotask
+
+    headers = {**DEFAULT_HEADERS, "Cookie": account.cookie}
+    task_list = nata_autotask.get_list_tasks(headers)
+    nata_autotask.finish_tasks(headers, task_list)
+    nata_autotask.receive_completed_tasks(headers, nata_autotask.get_list_tasks(headers))
+
+
+def flow_notify(account: Account, context: dict) -> None:
+    from utils.discord_webhook import send_discord_notification
+
+    send_discord_notification(f"Benchmark notification for {account.uid}")
+
+
+FLOWS: Dict[str, Callable[[Account, dict], None]] = {
+    'checkin': flow_checkin,
+    'redeem': flow_redeem,
+    'mimo': flow_mimo,
+    'notify': flow_notify,
+}
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run_flow(flow: Callable[[Account, dict], None], accounts: List[Account], context: dict, workers: int) -> dict:
+    def timed(account: Account) -> float:
+        start = time.perf_counter()
+        flow(account, context)
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    # The flows print per-code progress; keep the benchmark output readable.
+    with redirect_stdout(io.StringIO()), ThreadPoolExecutor(max_workers=workers) as executor:
+        durations = list(executor.map(timed, accounts))
+    elapsed = time.perf_counter() - start
+
+    return {
+        'accounts': len(accounts),
+        'wall_seconds': round(elapsed, 4),
+        'accounts_per_second': round(len(accounts) / elapsed, 2) if elapsed else 0.0,
+        'p50_ms': round(percentile(durations, 0.50) * 1000, 2),
+        'p99_ms': round(percentile(durations, 0.99) * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the check-in, redeem and Mimo flows against a mock server")
+    parser.add_argument('--fleet', default='1,100,1000', help="Comma-separated fleet sizes")
+    parser.add_argument('--flows', default='checkin,redeem,mimo', help=f"Comma-separated flows ({', '.join(FLOWS)})")
+    parser.add_argument('--workers', type=int, default=8, help="Accounts processed concurrently")
+    parser.add_argument('--latency', type=float, default=0.005, help="Mock latency per response, in seconds")
+    parser.add_argument('--latency-jitter', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0)
+    parser.add_argument('--codes', type=int, default=3, help="Active codes listed by the mock wiki")
+    parser.add_argument('--redeem-interval', type=float, default=0.0, help="Pause between codes of one account")
+    parser.add_argument('--json', dest='json_path', help="Also write the results to this JSON file")
+    args = parser.parse_args()
+
+    config = MockConfig(latency=args.latency, latency_jitter=args.latency_jitter, error_rate=args.error_rate,
+                        rate_limit_rate=args.rate_limit_rate, code_count=args.codes, seed=0)
+    server = MockServer(config).start()
+    http_client.set_base_url_override(server.base_url)
+    os.environ['DISCORD_WEBHOOK_URL'] = f"{server.base_url}/api/webhooks/0/mock"
+    os.environ.update({'UID': '800000000', 'REGION': 'os_asia', 'COOKIE': Account(0).cookie})
+    # Data files the flows write (the state store included) go to a scratch directory, not the checkout.
+    data_dir = tempfile.TemporaryDirectory(prefix='genshin-bench-')
+    repo_root, paths.REPO_ROOT = paths.REPO_ROOT, data_dir.name
+
+    try:
+        from redeem.redeem_code import scrape_genshin_codes
+
+        context = {'codes': scrape_genshin_codes(), 'redeem_interval': args.redeem_interval}
+        results = []
+        for flow_name in [name.strip() for name in args.flows.split(',') if name.strip()]:
+            for size in [int(size) for size in args.fleet.split(',') if size.strip()]:
+                accounts = [Account(index) for index in range(size)]
+                result = {'flow': flow_name, **run_flow(FLOWS[flow_name], accounts, context, args.workers)}
+                results.append(result)
+                print(f"{flow_name:<8} fleet={size:<5} {result['accounts_per_second']:>9.2f} acc/s  "
+                      f"p50={result['p50_ms']:>8.2f} ms  p99={result['p99_ms']:>8.2f} ms  "
+                      f"wall={result['wall_seconds']:.2f} s")
+
+        print(f"Mock requests served: {dict(server.state.requests)}")
+        if args.json_path:
+            with open(args.json_path, 'w', encoding='utf-8') as f:
+                json.dump({'config': vars(args), 'results': results}, f, indent=2)
+    finally:
+        http_client.close_session()
+        http_client.set_base_url_override(None)
+        server.stop()
+        state.reset()
+        paths.REPO_ROOT = repo_root
+        data_dir.cleanup()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1 @@
+"""Daily check-in for Genshin Auto Daily"""
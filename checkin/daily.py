@@ -1,37 +1,38 @@
 import os
-import sys
+import shutil
 import time
 import datetime
-from typing import Tuple
-
-import requests
-from dotenv import load_dotenv
-
-sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'utils'))
-try:
-    from discord_webhook import send_discord_notification
-    from constants import CHECKIN_API_URL, DAILY_CHECKIN_ACT_ID, CHECKIN_SUCCESS_CODES, CHECKIN_HEADERS
-except ImportError:
-    def send_discord_notification(content):
-        return False
-    
-    CHECKIN_API_URL = "https://sg-hk4e-api.hoyolab.com/event/sol/sign"
-    DAILY_CHECKIN_ACT_ID = "e202102251931481"
-    CHECKIN_SUCCESS_CODES = {0, -5003}
-    CHECKIN_HEADERS = {
-        "Content-Type": "application/json;charset=UTF-8",
-        "Origin": "https://act.hoyolab.com",
-        "Referer": "https://act.hoyolab.com/",
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-    }
-
-
-def checkin(url: str, payload: dict, headers: dict) -> Tuple[bool, str, str]:
+from typing import List, NamedTuple, Optional, Tuple
+
+from checkin.games import Game, games_for
+from checkin.rewards import RewardCalendar
+from utils import http_client, logs_prefetch, metrics
+from utils.accounts import Account, load_checked_accounts
+from utils.checkin_history import append_records, make_record
+from utils.discord_webhook import send_discord_notification
+from utils.constants import (CHECKIN_SUCCESS_CODES, CHECKIN_HEADERS, CHECKIN_LOG_FILE, CHECKIN_WORKERS,
+                             CHECKIN_REPORT_MAX_LINES)
+from utils.log_archive import open_log, rotate_log
+from utils.paths import data_path
+from utils.profiling import profile_entry_point
+
+
+class SignResult(NamedTuple):
+    account: Account
+    game: Game
+    success: bool
+    log_content: str
+    message: str
+    retcode: int
+    reward: Optional[dict]
+
+
+def checkin(url: str, payload: dict, headers: dict) -> Tuple[bool, str, str, int]:
     time_now = time.strftime("%d/%m/%Y %H:%M:%S", time.localtime())
     log_content = f"Request at: {time_now}\n"
     
     try:
-        response = requests.post(url, json=payload, headers=headers, timeout=30)
+        response = http_client.post(url, json=payload, headers=headers)
         response.raise_for_status()
         
         result = response.json()
@@ -40,75 +41,156 @@ def checkin(url: str, payload: dict, headers: dict) -> Tuple[bool, str, str]:
         retcode = result.get('retcode', -1)
         
         success = retcode in CHECKIN_SUCCESS_CODES
-        return success, log_content, message
+        return success, log_content, message, retcode
         
     except Exception as e:
         error_msg = str(e)
         log_content += f"\tError: {error_msg}"
-        return False, log_content, error_msg
+        return False, log_content, error_msg, -1
 
 
 def write_log(log_content: str) -> None:
-    log_file = "../genshin-checkin.log"
+    log_file = data_path(CHECKIN_LOG_FILE)
     timestamp = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S UTC')
     header = f"\n{'='*50}\n[{timestamp}] New Check-in Session\n{'='*50}\n"
     
     try:
         if os.path.exists(log_file):
-            with open(log_file, 'r', encoding='utf-8') as f:
-                old_content = f.read()
-            with open(log_file, 'w', encoding='utf-8') as f:
-                f.write(header + log_content + "\n" + old_content)
+            temp_file = log_file + ".tmp"
+            with open(temp_file, 'w', encoding='utf-8') as f, open_log(log_file) as old_log:
+                f.write(header + log_content + "\n")
+                shutil.copyfileobj(old_log, f)
+            os.replace(temp_file, log_file)
         else:
             with open(log_file, 'w', encoding='utf-8') as f:
                 f.write(header + log_content)
+
+        rotate_log(log_file)
     except Exception as e:
         print(f"Failed to write log file: {e}")
 
 
-def send_notification(success: bool, message: str) -> None:
+def sign(account: Account, game: Game) -> SignResult:
+    """Sign one game for one account; safe to run concurrently."""
+    headers = {**CHECKIN_HEADERS, **game.headers, "Cookie": account.cookie}
+    success, log_content, message, retcode = checkin(game.sign_url, {"act_id": game.act_id}, headers)
+    return SignResult(account, game, success, log_content, message, retcode, None)
+
+
+def name_reward(result: SignResult, calendar: RewardCalendar) -> SignResult:
+    """Attach the item claimed by a successful sign."""
+    if not result.success:
+        return result
+    # Runs after signing, so no sign waits for the calendar; a count fetched now already
+    # includes today's sign and is not advanced again.
+    calendar.prepare(result.account, result.game)
+    return result._replace(reward=calendar.record_sign(result.account, result.retcode, result.game))
+
+
+def build_report(results: List[SignResult], max_lines: int = CHECKIN_REPORT_MAX_LINES) -> str:
+    succeeded = sum(1 for result in results if result.success)
+    if succeeded == len(results):
+        title = "✅ **Daily Check-in Completed Successfully!**"
+    elif succeeded:
+        title = f"⚠️ **Daily Check-in Partially Completed ({succeeded}/{len(results)})**"
+    else:
+        title = "❌ **Daily Check-in Failed**"
+
+    if len(results) == 1:
+        result = results[0]
+        if not result.success:
+            return f"{title}\n\nResponse: {result.message}"
+        content = f"{title}\n\nYour daily rewards have been claimed."
+        if result.reward:
+            content += f"\n🎁 Day {result.reward['day']}: **{result.reward['name']} ×{result.reward['cnt']}**"
+        return content
+
+    # Failures first, so they are never the lines cut off by the cap.
+    ordered = sorted(results, key=lambda result: result.success)
+    lines = []
+    for result in ordered[:max_lines]:
+        line = f"{'✅' if result.success else '❌'} {result.account.label} · {result.game.name}"
+        if not result.success:
+            line += f": {result.message}"
+        elif result.reward:
+            line += f" — Day {result.reward['day']}: {result.reward['name']} ×{result.reward['cnt']}"
+        lines.append(line)
+    if len(ordered) > max_lines:
+        lines.append(f"…and {len(ordered) - max_lines} more")
+    return f"{title}\n\n" + "\n".join(lines)
+
+
+def send_notification(results: List[SignResult]) -> None:
     webhook_url = os.getenv('DISCORD_WEBHOOK_URL')
-    if not webhook_url:
+    if not webhook_url or not results:
         return
-    
+
+    # The stats embed only makes sense when the report is about a single account.
+    accounts = {result.account for result in results}
+    account = next(iter(accounts)) if len(accounts) == 1 else None
     try:
-        if success:
-            content = "✅ **Daily Check-in Completed Successfully!**\n\nYour daily rewards have been claimed."
-        else:
-            content = f"❌ **Daily Check-in Failed**\n\nResponse: {message}"
-        
-        send_discord_notification(content)
+        send_discord_notification(build_report(results), account=account)
     except Exception as e:
         print(f"Failed to send Discord notification: {e}")
 
 
-def validate_environment() -> Tuple[str]:
+def validate_environment() -> Tuple[List[Account], List[Tuple[Account, str]]]:
+    from dotenv import load_dotenv
+
     load_dotenv()
-    cookie = os.getenv('COOKIE')
-    
-    if not cookie:
-        raise ValueError("Missing required environment variable: COOKIE")
-    
-    return cookie
+    return load_checked_accounts()
+
+
+def run(accounts: Optional[List[Account]] = None) -> bool:
+    from concurrent.futures import ThreadPoolExecutor
+
+    rejected = []
+    if accounts is None:
+        accounts, rejected = validate_environment()
+    jobs, skipped = [], [account for account, _ in rejected]
+    for account in accounts:
+        try:
+            jobs.extend((account, game) for game in games_for(account))
+        except ValueError as e:
+            # One misconfigured registry entry must not stop the rest of the fleet.
+            print(f"Skipping check-in for {account.label}: {e}")
+            skipped.append(account)
+    if not jobs:
+        return not skipped
 
+    # Every account x game sign-in shares the pooled HTTP session; map keeps the job order.
+    with ThreadPoolExecutor(max_workers=min(CHECKIN_WORKERS, len(jobs))) as executor:
+        results = list(executor.map(lambda job: sign(*job), jobs))
 
+        # Everything from here on reads or writes files synced through the logs branch.
+        logs_prefetch.wait()
+        calendar = RewardCalendar()
+        results = list(executor.map(lambda result: name_reward(result, calendar), results))
+
+    multiple = len(results) > 1
+    log_parts = [f"Account: {result.account.label} · {result.game.name}\n{result.log_content}" if multiple
+                 else result.log_content for result in results]
+    history = [make_record(result.account.uid, result.success, result.message, game=result.game.key)
+               for result in results]
+
+    # One session entry per run keeps the prepend to a single rewrite of the log.
+    write_log("\n".join(log_parts))
+    append_records(history)
+    send_notification(results)
+    return not skipped and all(result.success for result in results)
+
+
+@profile_entry_point('checkin')
 def main():
     try:
-        cookie = validate_environment()
-        
-        payload = {"act_id": DAILY_CHECKIN_ACT_ID}
-        headers = {**CHECKIN_HEADERS, "Cookie": cookie}
-        
-        success, log_content, message = checkin(CHECKIN_API_URL, payload, headers)
-        
-        write_log(log_content)
-        send_notification(success, message)
-        
+        success = run()
         exit(0 if success else 1)
         
     except Exception as e:
         print(f"Fatal error: {e}")
         exit(1)
+    finally:
+        metrics.export()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,59 @@
+"""Sign-in endpoints of every HoYoLAB game the check-in engine knows about."""
+
+import os
+from typing import Dict, List, NamedTuple, Optional
+
+from utils.accounts import Account
+from utils.constants import (CHECKIN_API_BASE, STARRAIL_CHECKIN_API_BASE, ZZZ_CHECKIN_API_BASE,
+                             DAILY_CHECKIN_ACT_ID, STARRAIL_CHECKIN_ACT_ID, ZZZ_CHECKIN_ACT_ID,
+                             DEFAULT_CHECKIN_GAMES)
+
+CHECKIN_GAMES_ENV = 'CHECKIN_GAMES'
+
+
+class Game(NamedTuple):
+    key: str
+    name: str
+    api_base: str
+    act_id: str
+    headers: Dict[str, str] = {}
+
+    @property
+    def sign_url(self) -> str:
+        return f"{self.api_base}/sign"
+
+    @property
+    def home_url(self) -> str:
+        return f"{self.api_base}/home"
+
+    @property
+    def info_url(self) -> str:
+        return f"{self.api_base}/info"
+
+
+# Star Rail and ZZZ share the sign/home/info layout but need x-rpc-signgame to reach their event.
+GAMES: Dict[str, Game] = {
+    'genshin': Game('genshin', "Genshin Impact", CHECKIN_API_BASE, DAILY_CHECKIN_ACT_ID),
+    'starrail': Game('starrail', "Honkai: Star Rail", STARRAIL_CHECKIN_API_BASE, STARRAIL_CHECKIN_ACT_ID,
+                     {'x-rpc-signgame': 'hkrpg'}),
+    'zzz': Game('zzz', "Zenless Zone Zero", ZZZ_CHECKIN_API_BASE, ZZZ_CHECKIN_ACT_ID,
+                {'x-rpc-signgame': 'zzz'}),
+}
+
+
+def parse_games(spec: str) -> List[Game]:
+    """Parse a comma-separated list of game keys (e.g. ``genshin,starrail``)."""
+    keys = [key.strip().lower() for key in spec.split(',') if key.strip()]
+    unknown = [key for key in keys if key not in GAMES]
+    if unknown:
+        raise ValueError(f"Unknown game(s) {', '.join(unknown)}; expected any of {', '.join(GAMES)}")
+    return [GAMES[key] for key in dict.fromkeys(keys)]
+
+
+def games_for(account: Account, default: Optional[List[Game]] = None) -> List[Game]:
+    """The games to sign for an account: its registry entry, else CHECKIN_GAMES, else Genshin."""
+    if account.games:
+        return parse_games(','.join(account.games))
+    if default is not None:
+        return default
+    return parse_games(os.getenv(CHECKIN_GAMES_ENV) or ','.join(DEFAULT_CHECKIN_GAMES))
@@ -0,0 +1,104 @@
+"""Monthly check-in reward calendar and per-account sign-day counts."""
+
+import threading
+from typing import Dict, List, Optional
+
+from checkin.games import GAMES, Game
+from utils import http_client, state
+from utils.accounts import Account
+from utils.checkin_history import game_day
+from utils.constants import CHECKIN_HEADERS
+
+
+# The calendar is fetched once a month per game and region and the sign-day count once a month
+# per game and account; after that the count advances locally on each sign, so naming the
+# claimed item costs no requests on ordinary days.
+class RewardCalendar:
+    def __init__(self):
+        self.month = game_day().strftime('%Y-%m')
+        self._lock = threading.Lock()
+        self._key_locks: Dict[str, threading.Lock] = {}
+
+    def prepare(self, account: Account, game: Game = GAMES['genshin']) -> None:
+        """Make sure this month's calendar and sign-day count are cached; call before ``record_sign``."""
+        # Workers naming rewards in parallel share one fetch per calendar and per account.
+        calendar_key = _key(game, account.region or 'default')
+        with self._key_lock(f"calendar:{calendar_key}"):
+            if state.get(state.CHECKIN_CALENDARS, calendar_key, {}).get('month') != self.month:
+                awards = _fetch_awards(account, game)
+                if awards is not None:
+                    state.put(state.CHECKIN_CALENDARS, calendar_key, {'month': self.month, 'awards': awards})
+
+        account_key = _key(game, account.uid)
+        with self._key_lock(f"account:{account_key}"):
+            if state.get(state.CHECKIN_SIGN_DAYS, account_key, {}).get('month') != self.month:
+                self._refresh_sign_days(account, game)
+
+    def record_sign(self, account: Account, retcode: int, game: Game = GAMES['genshin']) -> Optional[dict]:
+        """Advance the count after a sign and return the award claimed today, if known."""
+        account_key = _key(game, account.uid)
+        today = game_day().isoformat()
+        if retcode != 0:
+            with self._key_lock(f"account:{account_key}"):
+                # Already signed elsewhere today: the cached count may not include that sign yet.
+                if state.get(state.CHECKIN_SIGN_DAYS, account_key, {}).get('last_day') != today:
+                    self._refresh_sign_days(account, game)
+
+        with self._lock:
+            sign_days = state.get(state.CHECKIN_SIGN_DAYS, account_key)
+            if not sign_days or sign_days.get('month') != self.month:
+                return None
+            if sign_days.get('last_day') != today:
+                if retcode != 0:
+                    # The refresh failed, so the count may still miss today's sign.
+                    return None
+                sign_days['sign_days'] += 1
+                sign_days['last_day'] = today
+                state.put(state.CHECKIN_SIGN_DAYS, account_key, sign_days)
+            day = sign_days['sign_days']
+
+        awards = state.get(state.CHECKIN_CALENDARS, _key(game, account.region or 'default'), {}).get('awards', [])
+        if not 0 < day <= len(awards):
+            return None
+        return {**awards[day - 1], 'day': day}
+
+    def _key_lock(self, key: str) -> threading.Lock:
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def _refresh_sign_days(self, account: Account, game: Game) -> None:
+        info = _fetch_sign_info(account, game)
+        if info is not None:
+            state.put(state.CHECKIN_SIGN_DAYS, _key(game, account.uid),
+                      {'month': self.month, 'sign_days': info.get('total_sign_day', 0),
+                       'last_day': game_day().isoformat() if info.get('is_sign') else None})
+
+
+def _key(game: Game, name: str) -> str:
+    # Genshin keeps the bare keys written before other games were signed.
+    return name if game.key == 'genshin' else f"{game.key}:{name}"
+
+
+def _fetch_awards(account: Account, game: Game) -> Optional[List[dict]]:
+    data = _get(game.home_url, account, game)
+    if data is None:
+        return None
+    return [{'name': award.get('name', ''), 'cnt': award.get('cnt', 0)} for award in data.get('awards', [])]
+
+
+def _fetch_sign_info(account: Account, game: Game) -> Optional[dict]:
+    return _get(game.info_url, account, game)
+
+
+def _get(url: str, account: Account, game: Game) -> Optional[dict]:
+    try:
+        response = http_client.get(url, params={'act_id': game.act_id, 'lang': 'en-us'},
+                                   headers={**CHECKIN_HEADERS, **game.headers, 'Cookie': account.cookie})
+        response.raise_for_status()
+        result = response.json()
+        if result.get('retcode') != 0:
+            return None
+        return result.get('data') or {}
+    except Exception as e:
+        print(f"Failed to fetch {url}: {e}")
+        return None
@@ -0,0 +1 @@
+"""Mimo Travel auto tasks for Genshin Auto Daily"""
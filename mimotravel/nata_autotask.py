@@ -1,29 +1,14 @@
-import os
-import sys
 from typing import List, Dict, Any, Optional, Set
 
-import requests
-from dotenv import load_dotenv
-
-sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'utils'))
-try:
-    from discord_webhook import send_discord_notification
-    from constants import MIMO_LIST_TASKS_API_URL, MIMO_FINISH_TASK_API_URL, MIMO_RECEIVE_POINT_API_URL, DEFAULT_HEADERS, MIMO_VERSION_ID
-except ImportError:
-    def send_discord_notification(content):
-        return False
-    
-    MIMO_VERSION_ID = 58
-    MIMO_LIST_TASKS_API_URL = f"https://sg-public-api.hoyolab.com/event/e2023mimotravel/nata/task_list?game_id=2&version_id={MIMO_VERSION_ID}"
-    MIMO_FINISH_TASK_API_URL = "https://sg-public-api.hoyolab.com/event/e2023mimotravel/nata/finish_task"
-    MIMO_RECEIVE_POINT_API_URL = "https://sg-public-api.hoyolab.com/event/e2023mimotravel/nata/receive_point"
-    DEFAULT_HEADERS = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-    }
+from utils import http_client, metrics
+from utils.accounts import Account, load_checked_accounts
+from utils.discord_webhook import send_discord_notification
+from utils.profiling import profile_entry_point
+from utils.constants import MIMO_LIST_TASKS_API_URL, MIMO_FINISH_TASK_API_URL, MIMO_RECEIVE_POINT_API_URL, DEFAULT_HEADERS, MIMO_VERSION_ID
 
 def get_list_tasks(headers: dict) -> Optional[Dict]:    
     try:
-        response = requests.get(MIMO_LIST_TASKS_API_URL, headers=headers, timeout=30)
+        response = http_client.get(MIMO_LIST_TASKS_API_URL, headers=headers)
         response.raise_for_status()
 
         data = response.json()
@@ -73,7 +58,7 @@ def finish_tasks(headers: dict, task_list: Optional[Dict]) -> List[Dict[str, Any
             "lang": "en-us"
         }
         try:
-            response = requests.post(MIMO_FINISH_TASK_API_URL, json=payload, headers=headers, timeout=30)
+            response = http_client.post(MIMO_FINISH_TASK_API_URL, json=payload, headers=headers)
             result = response.json()
             status = "success" if result.get('retcode') == 0 and result.get('message') == 'OK' else "failed"
         except Exception:
@@ -103,7 +88,7 @@ def receive_point(headers: dict, finish_statuses: Optional[Dict]) -> List[Dict[s
         if task["finish_status"] == "success":
             params = { "task_id": task["task_id"] }
             try:
-                response = requests.post(MIMO_RECEIVE_POINT_API_URL, json=payload, headers=headers, params=params, timeout=30)
+                response = http_client.post(MIMO_RECEIVE_POINT_API_URL, json=payload, headers=headers, params=params)
                 response.raise_for_status()
                 receive_status = "success" if response.json().get("retcode") == 0 else "failed"
             except Exception:
@@ -141,7 +126,7 @@ def receive_completed_tasks(headers: dict, task_list: Optional[Dict]) -> List[Di
     for task in tasks_to_receive:
         params = { "task_id": task["task_id"] }
         try:
-            response = requests.post(MIMO_RECEIVE_POINT_API_URL, json=payload, headers=headers, params=params, timeout=30)
+            response = http_client.post(MIMO_RECEIVE_POINT_API_URL, json=payload, headers=headers, params=params)
             response.raise_for_status()
             receive_status = "success" if response.json().get("retcode") == 0 else "failed"
         except Exception:
@@ -157,17 +142,32 @@ def receive_completed_tasks(headers: dict, task_list: Optional[Dict]) -> List[Di
     return receive_statuses
 
 
-def main():
-    load_dotenv()
+def run(accounts: Optional[List[Account]] = None) -> bool:
+    rejected = []
+    if accounts is None:
+        from dotenv import load_dotenv
+
+        load_dotenv()
+        accounts, rejected = load_checked_accounts()
+
+    all_success = not rejected
+    for account in accounts:
+        if len(accounts) > 1:
+            print(f"=== Account {account.label} ===")
+        all_success = run_account(account) and all_success
+    return all_success
+
+
+def run_account(account: Account) -> bool:
     headers = {
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
-        "Cookie": os.getenv('COOKIE')
+        "Cookie": account.cookie
     }
 
     task_list = get_list_tasks(headers)
     if not task_list:
         print("Failed to retrieve task list.")
-        return
+        return False
 
     finish_statuses = finish_tasks(headers, task_list)
     if finish_statuses:
@@ -178,19 +178,30 @@ def main():
     updated_task_list = get_list_tasks(headers)
     if not updated_task_list:
         print("Failed to retrieve updated task list.")
-        return
+        return False
 
     receive_statuses = receive_completed_tasks(headers, updated_task_list)
     if not receive_statuses:
         print("No completed tasks to receive points.")
-        return
+        return True
 
     content = ""
     for status in receive_statuses:
         print(f"Task: {status['task_name']}, Receive Status: {status.get('receive_status', 'N/A')}")
         content += f"Task: {status['task_name']}, Receive Status: {status.get('receive_status', 'N/A')}\n"
     if content:
-        send_discord_notification(content)
+        send_discord_notification(content, account=account)
+    return True
+
+
+@profile_entry_point('mimo')
+def main():
+    try:
+        success = run()
+    finally:
+        metrics.export()
+    if not success:
+        exit(1)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
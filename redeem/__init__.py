@@ -0,0 +1 @@
+"""Promotion code redemption for Genshin Auto Daily"""
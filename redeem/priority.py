@@ -0,0 +1,105 @@
+"""Order in which codes are redeemed when not all of them may get through."""
+
+import math
+import re
+import time
+from typing import List, Optional, Tuple
+
+from redeem.records import CodeInfo
+from utils.constants import REDEEM_REWARD_VALUES
+
+_INDEFINITE = re.compile(r'indefinite|permanent|no expir|never', re.IGNORECASE)
+_RELATIVE = re.compile(r'(\d+)\s*(hour|day|week)s?', re.IGNORECASE)
+_UNIT_SECONDS = {'hour': 3600, 'day': 86400, 'week': 7 * 86400}
+_ISO_DATE = re.compile(r'(\d{4})-(\d{1,2})-(\d{1,2})')
+_MONTH_FIRST = re.compile(r'([A-Za-z]{3,9})\.?\s+(\d{1,2})(?:st|nd|rd|th)?,?\s+(\d{4})')
+_DAY_FIRST = re.compile(r'(\d{1,2})(?:st|nd|rd|th)?\s+([A-Za-z]{3,9})\.?,?\s+(\d{4})')
+_REWARD = re.compile(r"([^\W\d_][\w'’ ]*?)\s*[×x*]\s*(\d[\d,]*)")
+
+
+def parse_expiry(duration: str, now: Optional[float] = None) -> Optional[float]:
+    """Timestamp the code stops working, ``math.inf`` for indefinite codes, None when unknown."""
+    if not duration or duration == 'unknown':
+        return None
+    if _INDEFINITE.search(duration):
+        return math.inf
+
+    dates = [_date_end(year, month, day) for year, month, day in _ISO_DATE.findall(duration)]
+    dates += [_date_end(year, _month(month), day) for month, day, year in _MONTH_FIRST.findall(duration)]
+    dates += [_date_end(year, _month(month), day) for day, month, year in _DAY_FIRST.findall(duration)]
+    dates = [date for date in dates if date is not None]
+    if dates:
+        # "Discovered ... Valid until ..." lists both dates; the later one is the expiry.
+        return max(dates)
+
+    match = _RELATIVE.search(duration)
+    if match:
+        now = time.time() if now is None else now
+        return now + int(match.group(1)) * _UNIT_SECONDS[match.group(2).lower()]
+    return None
+
+
+def reward_value(rewards: str) -> float:
+    """Rough worth of a code's rewards in Primogems; zero for items with no known weight."""
+    text = rewards.replace('[[', '').replace(']]', '')
+    value = 0.0
+    for name, amount in _REWARD.findall(text):
+        name = name.strip().lower()
+        weight = next((weight for item, weight in REDEEM_REWARD_VALUES.items() if item in name), 0.0)
+        value += weight * int(amount.replace(',', ''))
+    return value
+
+
+def priority_key(code: CodeInfo, now: Optional[float] = None) -> Tuple[int, float, float]:
+    """Sort key putting the most urgent, most valuable code first."""
+    expiry = parse_expiry(code.duration, now)
+    # An unreadable expiry ranks after every dated code but before indefinite ones.
+    if expiry is None:
+        return 1, 0.0, -reward_value(code.rewards)
+    if expiry == math.inf:
+        return 2, 0.0, -reward_value(code.rewards)
+    return 0, expiry, -reward_value(code.rewards)
+
+
+def prioritize(codes: List[CodeInfo], now: Optional[float] = None) -> List[CodeInfo]:
+    now = time.time() if now is None else now
+    return sorted(codes, key=lambda code: priority_key(code, now))
+
+
+def schedule(queues: List[List[CodeInfo]], now: Optional[float] = None) -> List[Tuple[int, CodeInfo]]:
+    """Interleave per-account code lists into ``(queue index, code)`` work items."""
+    now = time.time() if now is None else now
+    # Work is code-major: the best code goes out for every account before any account gets its
+    # second, so a run cut short still covers the codes that matter for the whole fleet.
+    keys = {}
+    work = []
+    for index, codes in enumerate(queues):
+        for code in codes:
+            key = keys.get(code.code.upper())
+            if key is None:
+                key = keys[code.code.upper()] = priority_key(code, now)
+            work.append((key, index, code))
+    # Ties are broken by code, so equally ranked codes still go out one code at a time.
+    work.sort(key=lambda item: (item[0], item[2].code.upper(), item[1]))
+    return [(index, code) for _, index, code in work]
+
+
+def _month(name: str) -> int:
+    from datetime import datetime
+
+    for fmt in ('%B', '%b'):
+        try:
+            return datetime.strptime(name[:3] if fmt == '%b' else name, fmt).month
+        except ValueError:
+            continue
+    return 0
+
+
+def _date_end(year, month, day) -> Optional[float]:
+    from datetime import datetime, timezone
+
+    try:
+        # Codes stay valid through the listed day; end-of-day UTC is close enough for ordering.
+        return datetime(int(year), int(month), int(day), tzinfo=timezone.utc).timestamp() + 86400
+    except ValueError:
+        return None
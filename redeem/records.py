@@ -0,0 +1,116 @@
+"""Compact records for scraped codes and redemption outcomes, and their consumers"""
+
+import json
+import time
+from typing import IO, List, Optional
+
+from utils.constants import REDEEM_REPORT_MAX_DETAILS, REDEEM_SUCCESS_CODES
+
+
+class CodeInfo:
+    __slots__ = ('code', 'server', 'rewards', 'duration')
+
+    def __init__(self, code: str, server: List[str], rewards: str = '', duration: str = 'unknown'):
+        self.code = code
+        self.server = server
+        self.rewards = rewards
+        self.duration = duration
+
+    def __repr__(self) -> str:
+        return f"CodeInfo({self.code!r})"
+
+    def as_dict(self) -> dict:
+        return {'code': self.code, 'server': self.server, 'rewards': self.rewards, 'duration': self.duration}
+
+
+class RedeemOutcome:
+    __slots__ = ('code', 'uid', 'retcode', 'message')
+
+    def __init__(self, code: CodeInfo, uid: str, retcode: int, message: str):
+        self.code = code
+        self.uid = uid
+        self.retcode = retcode
+        self.message = message
+
+    @property
+    def success(self) -> bool:
+        return self.retcode == 0
+
+    @property
+    def cacheable(self) -> bool:
+        return self.retcode in REDEEM_SUCCESS_CODES
+
+    def as_dict(self) -> dict:
+        return {'uid': self.uid, 'code': self.code.code, 'retcode': self.retcode, 'message': self.message,
+                'success': self.success, 'cacheable': self.cacheable}
+
+
+class ResultSink:
+    """Appends one JSON line per outcome as soon as it is known."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file: Optional[IO[str]] = None
+
+    def __enter__(self) -> 'ResultSink':
+        self._file = open(self.path, 'a', encoding='utf-8')
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def write(self, outcome: RedeemOutcome) -> None:
+        if self._file is None:
+            return
+        record = outcome.as_dict()
+        record['ts'] = int(time.time())
+        self._file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self._file.flush()
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class ReportBuilder:
+    """Builds the Discord redemption report incrementally."""
+
+    def __init__(self, max_details: int = REDEEM_REPORT_MAX_DETAILS):
+        self.max_details = max_details
+        self.total = 0
+        self.succeeded = 0
+        # Only the first max_details outcomes are kept as text; the rest are only counted.
+        self.details: List[str] = []
+        self.cached: List[str] = []
+        self.cached_count = 0
+
+    def add(self, outcome: RedeemOutcome) -> None:
+        self.total += 1
+        if outcome.success:
+            self.succeeded += 1
+        if outcome.cacheable:
+            self.cached_count += 1
+            if len(self.cached) < self.max_details:
+                self.cached.append(outcome.code.code)
+
+        if len(self.details) < self.max_details:
+            status = "✅ Success" if outcome.success else f"❌ {outcome.message} (retcode: {outcome.retcode})"
+            rewards = outcome.code.rewards or 'Unknown rewards'
+            self.details.append(f"**{outcome.code.code}**\n• Rewards: {rewards}\n• Status: {status}")
+
+    def render(self) -> str:
+        codes_text = "\n\n".join(self.details)
+        if self.total > len(self.details):
+            codes_text += f"\n\n…and {self.total - len(self.details)} more"
+
+        cached_summary = ""
+        if self.cached:
+            cached_codes = ', '.join(self.cached)
+            if self.cached_count > len(self.cached):
+                cached_codes += f" (+{self.cached_count - len(self.cached)} more)"
+            cached_summary = f"\n\n**📂 Codes added to cache (Repository - branch logs):**\n{cached_codes}"
+
+        return (f"🎁 **Code Redemption Report**\n\n"
+                f"**Summary:** {self.succeeded}/{self.total} codes successful\n\n"
+                f"**Code details:**\n{codes_text}{cached_summary}")
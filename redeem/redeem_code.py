@@ -2,138 +2,71 @@ import os
 import re
 import sys
 import time
-from typing import List, Dict, Any, Set
-
-import requests
-
-sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'utils'))
-try:
-    from discord_webhook import send_discord_notification
-    from constants import WIKI_API_URL, REDEEM_API_URL, RATE_LIMIT_CODE, REDEEM_SUCCESS_CODES, DEFAULT_HEADERS
-except ImportError:
-    def send_discord_notification(content):
-        return False
-
-    WIKI_API_URL = "https://genshin-impact.fandom.com/api.php?action=parse&page=Promotional_Code&prop=wikitext&format=json"
-    REDEEM_API_URL = "https://public-operation-hk4e.hoyoverse.com/common/apicdkey/api/webExchangeCdkey"
-    RATE_LIMIT_CODE = -2016
-    REDEEM_SUCCESS_CODES = {0, -2017, -1007, -2001}
-    DEFAULT_HEADERS = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36",
-        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8",
-        "Accept-Language": "en-US,en;q=0.9",
-    }
+from typing import Iterator, List, Dict, Any, Optional, Set, Tuple
+
+from redeem import priority
+from redeem.records import CodeInfo, RedeemOutcome, ReportBuilder, ResultSink
+from redeem.sources import SourceResult, WikiSource, fetch_results, merge_results
+from utils import deadline, http_client, logs_prefetch, metrics, state
+from utils.accounts import Account, load_checked_accounts
+from utils.discord_webhook import send_discord_notification
+from utils.game_roles import expand_roles
+from utils.log_archive import rotate_log
+from utils.paths import data_path
+from utils.profiling import profile_entry_point
+from utils.constants import (REDEEM_API_URL, RATE_LIMIT_CODE, COOKIE_EXPIRED_CODE, DEFAULT_HEADERS,
+                             REDEEMED_CODES_FILE, REDEEM_CODE_INTERVAL, REDEEM_RESULTS_FILE, LOG_SEGMENT_MAX_BYTES,
+                             LOG_ARCHIVE_CODEC)
 
 
 class CookieExpiredError(Exception):
     pass
 
 
-def scrape_genshin_codes() -> List[Dict[str, str]]:
+def scrape_genshin_codes() -> List[CodeInfo]:
+    """Active codes listed on the wiki alone; ``sources.fetch_codes`` also asks the other sources."""
     try:
-        response = requests.get(WIKI_API_URL, headers=DEFAULT_HEADERS, timeout=30)
-        response.raise_for_status()
-
-        wikitext = response.json()['parse']['wikitext']['*']
-
-        active_start = wikitext.find('==Active Codes==')
-        inactive_start = wikitext.find('==Inactive Codes==')
-        if active_start == -1:
-            return []
-        end_idx = inactive_start if inactive_start != -1 else len(wikitext)
-        active_section = wikitext[active_start:end_idx]
-
-        clean_section = re.sub(r'<!--.*?-->', '', active_section, flags=re.DOTALL)
-
-        codes_data = []
-        code_row_pattern = re.compile(r'\{\{Code Row(?!/)(.*?)\}\}', re.DOTALL)
-
-        for match in code_row_pattern.finditer(clean_section):
-            block = match.group(1)
-
-            if 'notacode=yes' in block:
-                continue
-
-            params = [p.strip() for p in block.split('|') if p.strip()]
-            positional = [p for p in params if not re.match(r'^[a-zA-Z_]+=', p)]
-
-            if len(positional) < 3:
-                continue
-
-            code_text = positional[0]
-            server_raw = positional[1]
-            rewards = re.sub(r'\s+', ' ', positional[2]).strip()
-            duration = positional[4] if len(positional) > 4 else 'unknown'
-
-            if not _is_valid_code(code_text):
-                continue
-
-            servers = _extract_server_names(server_raw)
-
-            if not any(existing['code'] == code_text for existing in codes_data):
-                codes_data.append({
-                    'code': code_text,
-                    'server': servers,
-                    'rewards': rewards,
-                    'duration': duration
-                })
-
-        return codes_data
-
+        return WikiSource().fetch()
     except Exception as e:
         print(f"Error scraping codes: {e}")
         raise
 
 
-_WIKI_SERVER_MAPPING = {
-    'G': ['os_usa', 'os_euro', 'os_asia', 'os_cht'],
-    'A': ['os_usa', 'os_euro', 'os_asia', 'os_cht', 'os_china'],
-    'NA': ['os_usa'],
-    'EU': ['os_euro'],
-    'SEA': ['os_asia'],
-    'SAR': ['os_cht'],
-    'CN': ['os_china'],
-}
-
-
-def _extract_server_names(server_raw: str) -> List[str]:
-    parts = re.split(r'[;,]', server_raw.strip().upper())
-    servers = []
-    for part in parts:
-        mapped = _WIKI_SERVER_MAPPING.get(part.strip(), [])
-        for s in mapped:
-            if s not in servers:
-                servers.append(s)
-    return servers if servers else ['os_usa', 'os_euro', 'os_asia', 'os_cht']
-
-
-def _is_valid_code(code_text: str) -> bool:
-    return bool(code_text and len(code_text) >= 8 and code_text.replace(' ', '').isalnum())
+def _read_cache_lines() -> List[str]:
+    codes_file = data_path(REDEEMED_CODES_FILE)
+    if not os.path.exists(codes_file):
+        return []
+    with open(codes_file, 'r', encoding='utf-8') as f:
+        content = f.read()
+    return [line.strip() for line in content.split('\n') if line.strip()]
 
 
-def get_existing_redeemed_codes() -> List[str]:
+def get_existing_redeemed_codes(uid: Optional[str] = None) -> List[str]:
+    """Codes already redeemed by ``uid``."""
     try:
-        codes_file = 'redeemed_codes.txt'
-        if not os.path.exists(codes_file):
-            codes_file = '../redeemed_codes.txt'
-            
-        if os.path.exists(codes_file):
-            with open(codes_file, 'r', encoding='utf-8') as f:
-                content = f.read()
-            return [line.strip() for line in content.split('\n') if line.strip()]
-        return []
+        # Bare CODE lines predate the accounts registry and belong to the UID account.
+        legacy_owner = uid is None or uid == os.getenv('UID')
+        codes = []
+        for line in _read_cache_lines():
+            owner, separator, code = line.rpartition(':')
+            if not separator:
+                if legacy_owner:
+                    codes.append(code)
+            elif uid is None or owner == uid:
+                codes.append(code)
+        return codes
     except Exception as e:
         print(f"Failed to read redeemed codes: {e}")
         return []
 
 
-def save_redeemed_codes(new_codes: List[Dict[str, str]]) -> bool:
+def save_redeemed_codes(new_codes: List[str], uid: Optional[str] = None) -> bool:
     if not new_codes:
         return True
     
     try:
-        existing_codes = get_existing_redeemed_codes()
-        new_code_strings = [code_data['code'] for code_data in new_codes]
+        existing_codes = _read_cache_lines()
+        new_code_strings = [f"{uid}:{code}" if uid else code for code in new_codes]
         all_codes = new_code_strings + existing_codes
         
         unique_codes = []
@@ -143,7 +76,7 @@ def save_redeemed_codes(new_codes: List[Dict[str, str]]) -> bool:
                 unique_codes.append(code)
                 seen.add(code)
         
-        codes_file = '../redeemed_codes.txt'
+        codes_file = data_path(REDEEMED_CODES_FILE)
         with open(codes_file, 'w', encoding='utf-8') as f:
             f.write('\n'.join(unique_codes))
         
@@ -154,35 +87,40 @@ def save_redeemed_codes(new_codes: List[Dict[str, str]]) -> bool:
         return False
 
 
-def redeem_code(session: requests.Session, uid: str, region: str, code: str) -> Dict[str, Any]:
+def redeem_code(uid: str, region: str, code: str, headers: Optional[dict] = None) -> Dict[str, Any]:
     for attempt in range(4):
         try:
-            response = session.get(
+            response = http_client.get(
                 REDEEM_API_URL,
                 params={
                     'lang': 'en', 'game_biz': 'hk4e_global', 'sLangKey': 'en-us',
                     'uid': uid, 'region': region, 'cdkey': code
                 },
-                timeout=30
+                headers=headers
             )
             
             result = response.json() if response.ok else {'retcode': -1, 'message': 'Network error'}
             retcode = result.get('retcode', -1)
 
-            if retcode == -1071:
+            if retcode == COOKIE_EXPIRED_CODE:
                 raise CookieExpiredError(result.get('message', 'Cookie expired or invalid'))
 
             if retcode == RATE_LIMIT_CODE and attempt < 3:
                 wait_time = _get_wait_time(result.get('message', ''))
-                time.sleep(wait_time)
+                metrics.record_sleep('rate_limit', deadline.sleep(wait_time), REDEEM_API_URL)
                 continue
             
             return result
             
+        except CookieExpiredError:
+            raise
+        except (http_client.CircuitOpenError, deadline.DeadlineExceeded) as e:
+            # The endpoint is down for every account (or the run is out of time);
+            # retrying here would only sleep.
+            return {'retcode': -1, 'message': str(e), 'short_circuited': True}
         except Exception as e:
-            if attempt == 3:
-                return {'retcode': -1, 'message': f'Error: {e}'}
-            time.sleep(2)
+            # http_client has already retried transport errors; this loop only waits out -2016.
+            return {'retcode': -1, 'message': f'Error: {e}'}
     
     return {'retcode': -1, 'message': 'Max retries exceeded'}
 
@@ -192,80 +130,91 @@ def _get_wait_time(message: str) -> int:
     return int(match.group(1)) + 1 if match else 5
 
 
-def redeem_multiple_codes(uid: str, region: str, cookie: str, codes: List[Dict[str, str]]) -> List[Dict[str, str]]:
-    session = requests.Session()
-    session.headers.update({**DEFAULT_HEADERS, 'Cookie': cookie})
+def iter_redemptions(uid: str, region: str, cookie: str, codes: List[CodeInfo],
+                     interval: float = REDEEM_CODE_INTERVAL) -> Iterator[RedeemOutcome]:
+    """Redeem ``codes`` one by one, most urgent first, yielding each outcome as soon as it is known."""
+    for _, outcome in _iter_scheduled([Account(uid, region, cookie)], [codes], interval):
+        if outcome.retcode == COOKIE_EXPIRED_CODE:
+            raise CookieExpiredError(outcome.message)
+        yield outcome
 
-    new_codes_redeemed = []
-    for code_data in codes:
-        try:
-            code = code_data['code']
-            result = redeem_code(session, uid, region, code)
-            retcode = result.get('retcode', -1)
 
-            status_entry = code_data.copy()
-            status_entry.update({
-                'retcode': retcode,
-                'message': result.get('message', 'unknown'),
-                'success': retcode == 0,
-                'cacheable': retcode in REDEEM_SUCCESS_CODES
-            })
-            new_codes_redeemed.append(status_entry)
-
-            _print_redemption_result(code, result, code_data)
-            time.sleep(1)
-        except CookieExpiredError:
-            raise
+# When each cookie last reached the redeem API, shared by every redemption of the run.
+_last_sent: Dict[str, float] = {}
+
+
+def _pace(cookie: str, interval: float) -> None:
+    if not interval or cookie not in _last_sent:
+        return
+    wait = _last_sent[cookie] + interval - time.monotonic()
+    if wait > 0:
+        metrics.record_sleep('pacing', deadline.sleep(wait), REDEEM_API_URL)
+
+
+def _iter_scheduled(roles: List[Account], queues: List[List[CodeInfo]], interval: float,
+                    labelled: bool = False) -> Iterator[Tuple[int, RedeemOutcome]]:
+    """Send the code x role work in priority order, yielding ``(role index, outcome)``."""
+    # Cookies are sent per request so the shared session can serve several accounts.
+    headers = [{**DEFAULT_HEADERS, 'Cookie': role.cookie} for role in roles]
+    expired: Set[str] = set()
+
+    for index, code_data in priority.schedule(queues):
+        role = roles[index]
+        if role.cookie in expired:
+            continue
+        _pace(role.cookie, interval)
+        try:
+            result = redeem_code(role.uid, role.region, code_data.code, headers=headers[index])
+            outcome = RedeemOutcome(code_data, role.uid, result.get('retcode', -1), result.get('message', 'unknown'))
+        except CookieExpiredError as e:
+            _last_sent[role.cookie] = time.monotonic()
+            expired.add(role.cookie)
+            yield index, RedeemOutcome(code_data, role.uid, COOKIE_EXPIRED_CODE, str(e))
+            continue
         except Exception as e:
-            error_entry = code_data.copy()
-            error_entry.update({
-                'retcode': -1,
-                'message': str(e),
-                'success': False,
-                'cacheable': False
-            })
-            new_codes_redeemed.append(error_entry)
-            print(f"Error with code {code_data.get('code', 'unknown')}: {e}")
-
-    return new_codes_redeemed
-
-
-def _print_redemption_result(code: str, result: Dict[str, Any], code_data: Dict[str, str]) -> None:
-    retcode = result.get('retcode', -1)
-    message = result.get('message', 'processed')
-    rewards = code_data['rewards'][:50] + ('...' if len(code_data['rewards']) > 50 else '')
-    
-    if retcode in REDEEM_SUCCESS_CODES:
-        print(f"Code {code}: {message} | Rewards: {rewards}")
+            print(f"Error with code {code_data.code}: {e}")
+            yield index, RedeemOutcome(code_data, role.uid, -1, str(e))
+            continue
+
+        if not result.get('short_circuited'):
+            _last_sent[role.cookie] = time.monotonic()
+        _print_redemption_result(outcome, role.label if labelled else None)
+        yield index, outcome
+
+
+def redeem_multiple_codes(uid: str, region: str, cookie: str, codes: List[CodeInfo],
+                          interval: float = REDEEM_CODE_INTERVAL) -> List[RedeemOutcome]:
+    return list(iter_redemptions(uid, region, cookie, codes, interval))
+
+
+def _print_redemption_result(outcome: RedeemOutcome, label: Optional[str] = None) -> None:
+    rewards = outcome.code.rewards[:50] + ('...' if len(outcome.code.rewards) > 50 else '')
+    prefix = f"[{label}] " if label else ""
+
+    if outcome.cacheable:
+        print(f"{prefix}Code {outcome.code.code}: {outcome.message} | Rewards: {rewards}")
     else:
-        print(f"Code {code} failed: {message}")
+        print(f"{prefix}Code {outcome.code.code} failed: {outcome.message}")
 
-def validate_environment() -> tuple[str, str, str]:
-    required_vars = ['UID', 'REGION', 'COOKIE']
-    env_values = {var: os.getenv(var) for var in required_vars}
-    missing = [k for k, v in env_values.items() if not v]
-    
-    if missing:
-        print(f"Missing environment variables: {', '.join(missing)}")
+def validate_environment() -> Tuple[List[Account], List[Tuple[Account, str]]]:
+    try:
+        accounts, rejected = load_checked_accounts()
+    except ValueError as e:
+        print(e)
         exit(1)
-    
-    return env_values['UID'], env_values['REGION'], env_values['COOKIE']
 
+    # Accounts without UID/REGION are redeemed for every role their cookie owns.
+    return accounts, rejected
 
-def filter_new_codes(all_codes: List[Dict[str, str]], region: str = None) -> List[Dict[str, str]]:
-    redeemed_codes = get_existing_redeemed_codes()
-    redeemed_codes_set = set(redeemed_codes)
-    new_codes = [code_data for code_data in all_codes if code_data['code'] not in redeemed_codes_set]
+
+def filter_new_codes(all_codes: List[CodeInfo], region: str = None, uid: Optional[str] = None) -> List[CodeInfo]:
+    redeemed_codes_set = set(get_existing_redeemed_codes(uid))
+    new_codes = [code_data for code_data in all_codes if code_data.code not in redeemed_codes_set]
     already_redeemed_count = len(all_codes) - len(new_codes)
     
     if region:
-        filtered_codes = []
-        for code_data in new_codes:
-            servers = code_data.get('server', [])
-            if isinstance(servers, str):
-                servers = [servers]
-            if 'all' in servers or region in servers:
-                filtered_codes.append(code_data)
+        filtered_codes = [code_data for code_data in new_codes
+                          if 'all' in code_data.server or region in code_data.server]
         
         print(f"Found {len(all_codes)} total codes, {already_redeemed_count} already redeemed, {len(new_codes)} new, {len(filtered_codes)} new match region '{region}'")
         return filtered_codes
@@ -274,87 +223,121 @@ def filter_new_codes(all_codes: List[Dict[str, str]], region: str = None) -> Lis
     return new_codes
 
 
-def send_discord_report(new_codes_redeemed: List[Dict[str, str]], cacheable_codes: List[Dict[str, str]]) -> None:
+def send_discord_report(report: ReportBuilder, account: Optional[Account] = None) -> None:
     webhook_url = os.getenv('DISCORD_WEBHOOK_URL')
     if not webhook_url:
         return
     
     try:
-        success_count = len([code for code in new_codes_redeemed if code.get('success', False)])
-        total_count = len(new_codes_redeemed)
-        
-        codes_detail = []
-        for code_data in new_codes_redeemed:
-            code = code_data.get('code', 'Unknown')
-            rewards = code_data.get('rewards', 'Unknown rewards')
-            
-            if code_data.get('success', False):
-                status = "✅ Success"
-            else:
-                retcode = code_data.get('retcode', -1)
-                message = code_data.get('message', 'Unknown error')
-                status = f"❌ {message} (retcode: {retcode})"
-            
-            codes_detail.append(f"**{code}**\n• Rewards: {rewards}\n• Status: {status}")
-        
-        codes_text = "\n\n".join(codes_detail)
-        
-        cached_summary = ""
-        if cacheable_codes:
-            cached_codes_list = [code_data.get('code', 'Unknown') for code_data in cacheable_codes]
-            cached_summary = f"\n\n**📂 Codes added to cache (Repository - branch logs):**\n{', '.join(cached_codes_list)}"
-        
-        content = (f"🎁 **Code Redemption Report**\n\n"
-                  f"**Summary:** {success_count}/{total_count} codes successful\n\n"
-                  f"**Code details:**\n{codes_text}{cached_summary}")
-        
-        send_discord_notification(content)
+        send_discord_notification(report.render(), account=account)
     except Exception as e:
         print(f"Failed to send Discord notification: {e}")
 
 
-def try_renew_cookie(uid, region, cookie) -> None:
+def try_renew_cookie(uid, region, cookie, account: Optional[Account] = None) -> bool:
+    """Touch the redeem API so the cookie stays alive; False when it has expired."""
     print("Attempting to renew cookie...")
     try:
-        redeem_multiple_codes(uid, region, cookie, [{'code': 'GENSHINGIFT', 'server': '', 'rewards': '', 'duration': ''}])
+        redeem_multiple_codes(uid, region, cookie, [CodeInfo('GENSHINGIFT', [])])
     except CookieExpiredError as e:
         content = (f"⚠️ **Hoyoverse cookie has expired or is invalid**\n"
                    f"Tried to redeem a random code **GENSHINGIFT**\n"
                    f" Got message: {e}\n")
-        send_discord_notification(content)
+        send_discord_notification(content, account=account)
         print("Cookie expired or invalid. Notification sent.")
-        sys.exit(1)
+        return False
+    return True
 
 
-def main():
-    try:
-        uid, region, cookie = validate_environment()
+def redeem_for_account(account: Account, all_codes_data: List[CodeInfo], sink: Optional[ResultSink] = None) -> bool:
+    return redeem_for_roles([(account, account)], all_codes_data, sink)
 
-        all_codes_data = scrape_genshin_codes()
+
+def redeem_for_roles(roles: List[Tuple[Account, Account]], all_codes_data: List[CodeInfo],
+                     sink: Optional[ResultSink] = None) -> bool:
+    """Redeem new codes for every ``(account, role)`` pair as one prioritized queue."""
+    all_success = True
+    queues = []
+    renewed: Set[str] = set()
+    for account, role in roles:
+        print(f"\n=== Account {role.label} ({role.region}) ===")
         if not all_codes_data:
             print("No codes found")
-            try_renew_cookie(uid, region, cookie)
-            return
-
-        new_codes_data = filter_new_codes(all_codes_data, region)
-        if not new_codes_data:
-            print("No new codes to redeem")
-            try_renew_cookie(uid, region, cookie)
-            return
-
-        new_codes_redeemed = redeem_multiple_codes(uid, region, cookie, new_codes_data)
-        cacheable_codes = [code for code in new_codes_redeemed if code.get('cacheable', False)]
-
-        if cacheable_codes:
-            print(f"\nWriting {len(cacheable_codes)} redeemed codes to file...")
-            if save_redeemed_codes(cacheable_codes):
-                print("Codes file updated successfully")
-            else:
-                print("Failed to update codes file")
+            new_codes_data = []
         else:
-            print("No codes were successfully redeemed")
-        
-        send_discord_report(new_codes_redeemed, cacheable_codes)
+            new_codes_data = filter_new_codes(all_codes_data, role.region, role.uid)
+            if not new_codes_data:
+                print("No new codes to redeem")
+        # Roles of one account share its cookie, which only needs renewing once.
+        if not new_codes_data and role.cookie not in renewed:
+            renewed.add(role.cookie)
+            all_success = try_renew_cookie(role.uid, role.region, role.cookie, account) and all_success
+        queues.append(new_codes_data)
+
+    # Outcomes are streamed to the sink and the reports instead of being collected.
+    reports = [ReportBuilder() for _ in roles]
+    cacheable_codes: List[List[str]] = [[] for _ in roles]
+    labelled = sum(1 for codes in queues if codes) > 1
+    for index, outcome in _iter_scheduled([role for _, role in roles], queues, REDEEM_CODE_INTERVAL, labelled):
+        account, role = roles[index]
+        if outcome.retcode == COOKIE_EXPIRED_CODE:
+            # Only this account is affected; the rest of the fleet keeps redeeming.
+            send_discord_notification(f"⚠️ **Hoyoverse cookie has expired or is invalid**\n "
+                                      f"Got message: {outcome.message}\n", account=account)
+            print(f"Cookie expired or invalid for {account.label}. Notification sent.")
+            all_success = False
+            continue
+        if sink is not None:
+            sink.write(outcome)
+        reports[index].add(outcome)
+        if outcome.cacheable:
+            cacheable_codes[index].append(outcome.code.code)
+
+    for index, (_, role) in enumerate(roles):
+        if reports[index].total:
+            _finish_role(role, reports[index], cacheable_codes[index])
+    return all_success
+
+
+def _finish_role(role: Account, report: ReportBuilder, cacheable_codes: List[str]) -> None:
+    if cacheable_codes:
+        print(f"\nWriting {len(cacheable_codes)} redeemed codes for {role.label} to file...")
+        if save_redeemed_codes(cacheable_codes, role.uid):
+            print("Codes file updated successfully")
+        else:
+            print("Failed to update codes file")
+    else:
+        print(f"No codes were successfully redeemed for {role.label}")
+
+    send_discord_report(report, role)
+
+
+def run(accounts: Optional[List[Account]] = None, all_codes_data: Optional[List[CodeInfo]] = None) -> bool:
+    try:
+        rejected = []
+        if accounts is None:
+            accounts, rejected = validate_environment()
+
+        # Codes are fetched once per run and shared by every account.
+        source_results = fetch_results() if all_codes_data is None else None
+        # The code cache is only needed from the filter step on.
+        logs_prefetch.wait()
+        if source_results is not None:
+            all_codes_data = _with_cached_codes(source_results)
+        all_success = not rejected
+        results_file = data_path(REDEEM_RESULTS_FILE)
+        seen_roles = set()
+        roles = []
+        for account in accounts:
+            account_roles = _roles_to_redeem(account, seen_roles)
+            if account_roles is None:
+                all_success = False
+                continue
+            roles.extend((account, role) for role in account_roles)
+        with ResultSink(results_file) as sink:
+            all_success = redeem_for_roles(roles, all_codes_data, sink) and all_success
+        rotate_log(results_file, LOG_SEGMENT_MAX_BYTES, LOG_ARCHIVE_CODEC)
+        return all_success
 
     except Exception as e:
         print(f"Fatal error: {e}")
@@ -366,5 +349,44 @@ def main():
                 print(f"Failed to send Discord notification: {e}")
         raise
 
+
+def _with_cached_codes(results: List[SourceResult]) -> List[CodeInfo]:
+    """Remember each source's fresh list, or fall back to its last one while it is unreachable."""
+    # Sources are cached one by one, so a partial fetch never replaces the list of a source that failed.
+    for index, result in enumerate(results):
+        if result.codes is not None:
+            state.put(state.WIKI_CODES, result.source.name, [code.as_dict() for code in result.codes])
+            continue
+        cached = state.get(state.WIKI_CODES, result.source.name)
+        if cached is not None:
+            print(f"Using the {len(cached)} code(s) {result.source.name} listed in an earlier run")
+            results[index] = result._replace(codes=[CodeInfo(**code) for code in cached])
+    return merge_results(results)
+
+
+def _roles_to_redeem(account: Account, seen_roles: Set[str]) -> Optional[List[Account]]:
+    """Every role of the account's cookie not redeemed yet this run; None when it has none."""
+    all_roles = expand_roles(account)
+    if not all_roles:
+        print(f"No game roles found for {account.label}; set its UID and REGION")
+        return None
+    # Two registry entries may share a cookie; their roles are only redeemed once.
+    roles = [role for role in all_roles if role.uid not in seen_roles]
+    seen_roles.update(role.uid for role in roles)
+    return roles
+
+
+@profile_entry_point('redeem')
+def main():
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    try:
+        success = run()
+    finally:
+        metrics.export()
+    if not success:
+        sys.exit(1)
+
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -0,0 +1,246 @@
+"""Where redemption codes come from."""
+
+import json
+import os
+import re
+import time
+from typing import Dict, List, NamedTuple, Optional
+
+from redeem.records import CodeInfo
+from utils import http_client, metrics
+from utils.constants import (WIKI_API_URL, DEFAULT_HEADERS, REPO_ROOT, EXTRA_CODES_FILE, CODE_SOURCES_DEFAULT,
+                             CODE_SOURCE_TIMEOUT)
+
+CODE_SOURCES_ENV = 'REDEEM_CODE_SOURCES'
+
+
+class CodeSource:
+    """One place to read codes from; subclasses implement ``fetch``."""
+
+    name = 'source'
+
+    def __init__(self, timeout: float = CODE_SOURCE_TIMEOUT):
+        self.timeout = timeout
+
+    def fetch(self) -> List[CodeInfo]:
+        raise NotImplementedError
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.name!r})"
+
+
+class SourceResult(NamedTuple):
+    source: CodeSource
+    codes: Optional[List[CodeInfo]]  # None when the source failed or did not answer in time
+    error: Optional[BaseException] = None
+
+
+class WikiSource(CodeSource):
+    name = 'wiki'
+
+    def fetch(self) -> List[CodeInfo]:
+        response = http_client.get(WIKI_API_URL, headers=DEFAULT_HEADERS, timeout=self.timeout)
+        response.raise_for_status()
+        return parse_wikitext(response.json()['parse']['wikitext']['*'])
+
+
+class FileSource(CodeSource):
+    def __init__(self, path: str, timeout: float = CODE_SOURCE_TIMEOUT):
+        super().__init__(timeout)
+        self.path = path if os.path.isabs(path) else os.path.join(REPO_ROOT, path)
+        self.name = f"file:{os.path.basename(path)}"
+
+    def fetch(self) -> List[CodeInfo]:
+        if not os.path.exists(self.path):
+            return []
+        with open(self.path, 'r', encoding='utf-8') as f:
+            return parse_code_list(f.read())
+
+
+class UrlListSource(CodeSource):
+    def __init__(self, url: str, timeout: float = CODE_SOURCE_TIMEOUT):
+        super().__init__(timeout)
+        self.url = url
+        self.name = f"url:{url}"
+
+    def fetch(self) -> List[CodeInfo]:
+        # One attempt: a slow list should give way to the other sources, not retry.
+        response = http_client.get(self.url, headers=DEFAULT_HEADERS, timeout=self.timeout, max_attempts=1)
+        response.raise_for_status()
+        return parse_code_list(response.text)
+
+
+def configured_sources(spec: Optional[str] = None) -> List[CodeSource]:
+    """Sources named by ``spec`` (default ``REDEEM_CODE_SOURCES``), plus the extra-codes file if it exists."""
+    spec = spec if spec is not None else os.getenv(CODE_SOURCES_ENV) or CODE_SOURCES_DEFAULT
+    sources: List[CodeSource] = []
+    for entry in (part.strip() for part in spec.split(',')):
+        if not entry:
+            continue
+        kind, _, target = entry.partition(':')
+        if entry == 'wiki':
+            sources.append(WikiSource())
+        elif kind == 'file' and target:
+            sources.append(FileSource(target))
+        elif kind == 'url' and target:
+            sources.append(UrlListSource(target))
+        else:
+            raise ValueError(f"Unknown code source '{entry}', expected wiki, file:<path> or url:<address>")
+
+    extra = FileSource(EXTRA_CODES_FILE)
+    if os.path.exists(extra.path) and not any(getattr(source, 'path', None) == extra.path for source in sources):
+        sources.append(extra)
+    return sources
+
+
+def fetch_codes(sources: Optional[List[CodeSource]] = None) -> List[CodeInfo]:
+    """Fetch every source concurrently and merge the results."""
+    return merge_results(fetch_results(sources))
+
+
+def fetch_results(sources: Optional[List[CodeSource]] = None) -> List[SourceResult]:
+    """Fetch every source concurrently, in source order; failed and late sources come back without codes."""
+    from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+    sources = sources if sources is not None else configured_sources()
+    if not sources:
+        return []
+
+    executor = ThreadPoolExecutor(max_workers=len(sources), thread_name_prefix='code-source')
+    started = time.monotonic()
+    futures = [executor.submit(source.fetch) for source in sources]
+    results: List[SourceResult] = []
+    status: Dict[str, object] = {}
+    try:
+        for source, future in zip(sources, futures):
+            try:
+                codes = future.result(timeout=max(source.timeout - (time.monotonic() - started), 0.0))
+                results.append(SourceResult(source, codes))
+                status[source.name] = len(codes)
+            except FutureTimeout:
+                print(f"Code source {source.name} did not answer within {source.timeout:.0f}s; skipping it")
+                status[source.name] = 'timeout'
+                results.append(SourceResult(source, None, TimeoutError(f"Code source {source.name} timed out")))
+            except Exception as e:
+                print(f"Code source {source.name} failed: {e}")
+                status[source.name] = 'error'
+                results.append(SourceResult(source, None, e))
+    finally:
+        # Late sources finish on their own; nobody waits for them.
+        executor.shutdown(wait=False)
+
+    metrics.set_info('code_sources', status)
+    return results
+
+
+def merge_results(results: List[SourceResult]) -> List[CodeInfo]:
+    """Merge the answered sources; raises the first source's error when none answered."""
+    answered = [result.codes for result in results if result.codes is not None]
+    if results and not answered:
+        raise results[0].error
+    return merge_codes(answered)
+
+
+def merge_codes(code_lists: List[List[CodeInfo]]) -> List[CodeInfo]:
+    """Merge lists in priority order, keeping one record per code (case-insensitive)."""
+    merged: Dict[str, CodeInfo] = {}
+    for codes in code_lists:
+        for code in codes:
+            key = code.code.upper()
+            existing = merged.get(key)
+            if existing is None:
+                merged[key] = CodeInfo(code.code, list(code.server), code.rewards, code.duration)
+                continue
+            if not existing.rewards and code.rewards:
+                existing.rewards = code.rewards
+            if existing.duration == 'unknown' and code.duration != 'unknown':
+                existing.duration = code.duration
+    return list(merged.values())
+
+
+def parse_wikitext(wikitext: str) -> List[CodeInfo]:
+    active_start = wikitext.find('==Active Codes==')
+    inactive_start = wikitext.find('==Inactive Codes==')
+    if active_start == -1:
+        return []
+    end_idx = inactive_start if inactive_start != -1 else len(wikitext)
+    active_section = wikitext[active_start:end_idx]
+
+    clean_section = re.sub(r'<!--.*?-->', '', active_section, flags=re.DOTALL)
+
+    codes_data = []
+    seen_codes = set()
+    code_row_pattern = re.compile(r'\{\{Code Row(?!/)(.*?)\}\}', re.DOTALL)
+
+    for match in code_row_pattern.finditer(clean_section):
+        block = match.group(1)
+
+        if 'notacode=yes' in block:
+            continue
+
+        params = [p.strip() for p in block.split('|') if p.strip()]
+        positional = [p for p in params if not re.match(r'^[a-zA-Z_]+=', p)]
+
+        if len(positional) < 3:
+            continue
+
+        code_text = positional[0]
+        server_raw = positional[1]
+        rewards = re.sub(r'\s+', ' ', positional[2]).strip()
+        duration = positional[4] if len(positional) > 4 else 'unknown'
+
+        if not _is_valid_code(code_text):
+            continue
+
+        servers = _extract_server_names(server_raw)
+
+        if code_text not in seen_codes:
+            seen_codes.add(code_text)
+            codes_data.append(CodeInfo(code_text, servers, rewards, duration))
+
+    return codes_data
+
+
+def parse_code_list(text: str) -> List[CodeInfo]:
+    """Parse a JSON list of code objects, or one ``CODE [| servers | rewards | duration]`` per line."""
+    if text.lstrip().startswith('['):
+        return [CodeInfo(str(entry['code']).strip(), list(entry.get('server') or _extract_server_names('')),
+                         entry.get('rewards', ''), entry.get('duration', 'unknown'))
+                for entry in json.loads(text) if _is_valid_code(str(entry.get('code', '')).strip())]
+
+    codes = []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        fields = [field.strip() for field in line.split('|')] + ['', '', '']
+        if not _is_valid_code(fields[0]):
+            continue
+        codes.append(CodeInfo(fields[0], _extract_server_names(fields[1]), fields[2], fields[3] or 'unknown'))
+    return codes
+
+
+_WIKI_SERVER_MAPPING = {
+    'G': ['os_usa', 'os_euro', 'os_asia', 'os_cht'],
+    'A': ['os_usa', 'os_euro', 'os_asia', 'os_cht', 'os_china'],
+    'NA': ['os_usa'],
+    'EU': ['os_euro'],
+    'SEA': ['os_asia'],
+    'SAR': ['os_cht'],
+    'CN': ['os_china'],
+}
+
+
+def _extract_server_names(server_raw: str) -> List[str]:
+    parts = re.split(r'[;,]', server_raw.strip().upper())
+    servers = []
+    for part in parts:
+        mapped = _WIKI_SERVER_MAPPING.get(part.strip(), [])
+        for s in mapped:
+            if s not in servers:
+                servers.append(s)
+    return servers if servers else ['os_usa', 'os_euro', 'os_asia', 'os_cht']
+
+
+def _is_valid_code(code_text: str) -> bool:
+    return bool(code_text and len(code_text) >= 8 and code_text.replace(' ', '').isalnum())
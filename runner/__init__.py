@@ -0,0 +1 @@
+"""Unified stage runner for Genshin Auto Daily"""
@@ -0,0 +1,194 @@
+"""Resident scheduler that runs every stage per account after the daily reset."""
+
+import argparse
+import os
+import random
+import sched
+import signal
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Set
+
+from utils import http_client, metrics, paths, state
+from utils.accounts import Account, load_checked_accounts
+from utils.constants import (REPO_ROOT, DAILY_RESET_UTC_HOUR, DAEMON_JITTER_WINDOW, DAEMON_STAGE_PERIODS,
+                             DAEMON_CODES_TTL, DAEMON_LOGS_INTERVAL)
+from utils.profiling import profile_entry_point
+from runner.run_all import STAGES, _parse_shard_arg, _shard_pattern, parse_stages
+
+
+def slot_start(now: float, period: float) -> float:
+    """Start of the stage slot containing ``now``; slots are aligned to the daily reset."""
+    anchor = DAILY_RESET_UTC_HOUR * 3600
+    return anchor + ((now - anchor) // period) * period
+
+
+class Daemon:
+    def __init__(self, accounts: List[Account], stage_names: List[str], jitter_window: float = DAEMON_JITTER_WINDOW,
+                 sync_logs: bool = True, metrics_dir: Optional[str] = None, seed: Optional[int] = None):
+        self.accounts = accounts
+        self.stage_names = stage_names
+        self.jitter_window = jitter_window
+        self.sync_logs = sync_logs
+        self.metrics_dir = metrics_dir
+        self.random = random.Random(seed)
+        self.scheduler = sched.scheduler(time.time, time.sleep)
+        # Stage functions are resolved up front: the logs branch checkout swaps the
+        # working tree, so nothing may be imported lazily while it is checked out.
+        self.stages = {name: STAGES[name].resolve() for name in stage_names}
+        self.dirty_logs: Set[str] = set()
+        self._codes = None
+        self._codes_fetched_at = 0.0
+
+    def offset(self, index: int, period: float) -> float:
+        # Stratified jitter: account i lands somewhere in the i-th of n equal sub-windows.
+        window = min(self.jitter_window, period)
+        return window * (index + self.random.random()) / len(self.accounts)
+
+    def start(self) -> None:
+        now = time.time()
+        for name in self.stage_names:
+            period = DAEMON_STAGE_PERIODS[name]
+            current = slot_start(now, period)
+            for index in range(len(self.accounts)):
+                offset = self.offset(index, period)
+                # A slot already under way when the daemon starts is spread from now instead.
+                run_at = current + offset if current + offset > now else now + offset
+                self._schedule(run_at, name, index, current)
+
+        if self.sync_logs:
+            self.scheduler.enter(DAEMON_LOGS_INTERVAL, 1, self._commit_logs_periodically)
+
+    def _schedule(self, run_at: float, stage_name: str, index: int, slot: float) -> None:
+        self.scheduler.enterabs(run_at, 0, self._run_job, (stage_name, index, slot))
+
+    def _run_job(self, stage_name: str, index: int, slot: float) -> None:
+        account = self.accounts[index]
+        _log(f"{stage_name} for {account.label}")
+        try:
+            if stage_name == 'redeem':
+                success = self.stages[stage_name]([account], self._codes_for_redeem())
+            else:
+                success = self.stages[stage_name]([account])
+            if not success:
+                _log(f"{stage_name} for {account.label} failed")
+        except Exception as e:
+            _log(f"{stage_name} for {account.label} failed: {e}")
+        finally:
+            self.dirty_logs.update(paths.data_file_name(log_file) for log_file in STAGES[stage_name].log_files)
+
+        period = DAEMON_STAGE_PERIODS[stage_name]
+        next_slot = slot + period
+        self._schedule(next_slot + self.offset(index, period), stage_name, index, next_slot)
+
+    def _codes_for_redeem(self):
+        if self._codes is None or time.time() - self._codes_fetched_at > DAEMON_CODES_TTL:
+            from redeem.sources import fetch_codes
+
+            try:
+                self._codes = fetch_codes()
+                self._codes_fetched_at = time.time()
+            except Exception:
+                # Let the stage fetch (and report the failure) itself.
+                return None
+        return self._codes
+
+    def _commit_logs_periodically(self) -> None:
+        self.commit_logs()
+        self.scheduler.enter(DAEMON_LOGS_INTERVAL, 1, self._commit_logs_periodically)
+
+    def commit_logs(self) -> None:
+        metrics.export(self.metrics_dir)
+        state.save()
+        if not self.sync_logs or not self.dirty_logs:
+            return
+        from utils.logs_manager import commit_logs
+
+        files = sorted(self.dirty_logs)
+        try:
+            commit_logs(files)
+            self.dirty_logs.clear()
+        except Exception as e:
+            _log(f"Committing logs failed, will retry: {e}")
+
+    def pending(self) -> Dict[str, float]:
+        """Next run time of each stage, for the startup summary."""
+        upcoming = {}
+        for event in self.scheduler.queue:
+            if event.action == self._run_job:
+                name = event.argument[0]
+                upcoming[name] = min(upcoming.get(name, event.time), event.time)
+        return upcoming
+
+
+def _log(message: str) -> None:
+    print(f"[{datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S UTC')}] {message}", flush=True)
+
+
+def _stop(signum, frame):
+    raise SystemExit(0)
+
+
+@profile_entry_point('daemon')
+def main():
+    parser = argparse.ArgumentParser(description="Stay resident and run each account's stages after the daily reset")
+    parser.add_argument('--stages', type=parse_stages, default=list(STAGES),
+                        help="Comma-separated stages to schedule (default: checkin,redeem,mimo)")
+    parser.add_argument('--jitter', type=float, default=DAEMON_JITTER_WINDOW,
+                        help=f"Seconds after each slot over which accounts are spread (default: {DAEMON_JITTER_WINDOW})")
+    parser.add_argument('--accounts', default=None, help="Accounts registry file")
+    parser.add_argument('--shard', type=_parse_shard_arg, default=None, help="Only run shard i of n (e.g. 0/4)")
+    parser.add_argument('--no-logs', action='store_true', help="Skip fetching and committing the logs branch")
+    parser.add_argument('--metrics-dir', default=None,
+                        help="Refresh run-summary.json and a Prometheus textfile here on every logs commit")
+    args = parser.parse_args()
+
+    metrics_dir = os.path.abspath(args.metrics_dir) if args.metrics_dir else None
+    accounts_file = os.path.abspath(args.accounts) if args.accounts else None
+
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    os.chdir(REPO_ROOT)
+
+    paths.set_shard(args.shard)
+    try:
+        accounts, rejected = load_checked_accounts(accounts_file, shard=args.shard)
+    except ValueError as e:
+        print(e)
+        exit(1)
+    if not accounts:
+        print("No accounts to schedule")
+        exit(1 if rejected else 0)
+
+    daemon = Daemon(accounts, args.stages, jitter_window=args.jitter, sync_logs=not args.no_logs,
+                    metrics_dir=metrics_dir)
+
+    fetch_patterns = list(dict.fromkeys(_shard_pattern(pattern) for name in args.stages
+                                        for pattern in STAGES[name].fetch_patterns))
+    if daemon.sync_logs and fetch_patterns:
+        from utils.logs_manager import fetch_logs
+
+        fetch_logs(fetch_patterns)
+
+    signal.signal(signal.SIGTERM, _stop)
+    daemon.start()
+    for name, next_run in sorted(daemon.pending().items()):
+        _log(f"Next {name}: {datetime.fromtimestamp(next_run, timezone.utc).strftime('%Y-%m-%d %H:%M:%S UTC')}")
+    _log(f"Scheduled {len(args.stages)} stage(s) for {len(accounts)} account(s)")
+
+    try:
+        daemon.scheduler.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        _log("Shutting down")
+        http_client.close_session()
+        daemon.commit_logs()
+    # Accounts skipped for a broken cookie fail the daemon even though the others ran.
+    if rejected:
+        exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,169 @@
+import argparse
+import importlib
+import os
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from utils import deadline, http_client, logs_prefetch, metrics, paths, state
+from utils.accounts import Account, load_checked_accounts, parse_shard
+from utils.constants import REPO_ROOT
+from utils.profiling import profile_entry_point
+
+
+class Stage(NamedTuple):
+    target: str
+    fetch_patterns: List[str]
+    log_files: List[str]
+
+    def resolve(self) -> Callable[[List[Account]], bool]:
+        # Stage modules are imported on demand so a run only loads what it executes.
+        module_name, function_name = self.target.split(':')
+        return getattr(importlib.import_module(module_name), function_name)
+
+
+STAGES: Dict[str, Stage] = {
+    'checkin': Stage('checkin.daily:run',
+                     ['genshin-checkin.log*', 'genshin-checkin.jsonl', 'genshin-checkin.idx', 'genshin-state.sqlite'],
+                     ['genshin-checkin.log', 'genshin-checkin.jsonl', 'genshin-checkin.idx', 'genshin-state.sqlite']),
+    'redeem': Stage('redeem.redeem_code:run',
+                    ['redeemed_codes.txt', 'redeem-results.jsonl*', 'genshin-state.sqlite'],
+                    ['redeemed_codes.txt', 'redeem-results.jsonl', 'genshin-state.sqlite']),
+    'mimo': Stage('mimotravel.nata_autotask:run', ['genshin-state.sqlite'], ['genshin-state.sqlite']),
+}
+
+
+def parse_stages(value: str) -> List[str]:
+    names = [name.strip() for name in value.split(',') if name.strip()]
+    unknown = [name for name in names if name not in STAGES]
+    if unknown:
+        raise argparse.ArgumentTypeError(f"Unknown stage(s): {', '.join(unknown)}")
+    return names
+
+
+def _shard_pattern(pattern: str) -> str:
+    from utils import reshard
+
+    # Caches are fetched under every shard layout so a re-sharded run can be seeded from them.
+    if pattern in reshard.SEEDED_FILES:
+        return reshard.fetch_pattern(pattern)
+    if pattern.endswith('*'):
+        return paths.data_file_name(pattern[:-1]) + '*'
+    return paths.data_file_name(pattern)
+
+
+def _parse_shard_arg(value: str) -> Tuple[int, int]:
+    try:
+        return parse_shard(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def run_stages(stage_names: List[str], sync_logs: bool = True,
+               accounts: Optional[List[Account]] = None, pipelined: bool = False) -> Dict[str, bool]:
+    """Run the stages in order between a fetch and a commit of the logs branch."""
+    stages = [STAGES[name] for name in stage_names]
+    # Files shared by several stages (the state store) are synced once.
+    fetch_patterns = list(dict.fromkeys(_shard_pattern(pattern) for stage in stages for pattern in stage.fetch_patterns))
+    log_files = list(dict.fromkeys(paths.data_file_name(log_file) for stage in stages for log_file in stage.log_files))
+    rejected = []
+    if accounts is None:
+        accounts, rejected = load_checked_accounts()
+
+    if sync_logs and fetch_patterns and pipelined:
+        logs_prefetch.start(fetch_patterns)
+    elif sync_logs and fetch_patterns:
+        from utils.logs_manager import fetch_logs
+
+        fetch_logs(fetch_patterns)
+
+    results = {}
+    try:
+        for name, stage in zip(stage_names, stages):
+            print(f"\n=== Stage: {name} ===")
+            if deadline.expired():
+                print(f"Stage {name} skipped: run deadline reached")
+                results[name] = False
+                continue
+            try:
+                results[name] = bool(stage.resolve()(accounts))
+            except (Exception, SystemExit) as e:
+                print(f"Stage {name} failed: {e}")
+                results[name] = False
+    finally:
+        http_client.close_session()
+        # Stages that failed before reaching their data files never waited.
+        logs_prefetch.wait()
+        state.save()
+    if rejected:
+        results['accounts'] = False
+
+    if sync_logs and log_files:
+        from utils.logs_manager import commit_logs
+
+        # A failed commit must not hide the stage results from the summary.
+        try:
+            commit_logs(log_files)
+        except Exception as e:
+            print(f"Committing logs failed: {e}")
+            results['logs'] = False
+
+    return results
+
+
+@profile_entry_point('runner')
+def main():
+    parser = argparse.ArgumentParser(description="Run check-in, code redemption and Mimo tasks in one process")
+    parser.add_argument('--stages', type=parse_stages, default=list(STAGES),
+                        help="Comma-separated stages to run (default: checkin,redeem,mimo)")
+    parser.add_argument('--no-logs', action='store_true',
+                        help="Skip fetching and committing the logs branch")
+    parser.add_argument('--pipelined', action='store_true',
+                        help="Fetch the logs branch in the background while the stages make their network calls")
+    parser.add_argument('--metrics-dir', default=None,
+                        help="Write run-summary.json and a Prometheus textfile here (default: $GENSHIN_AUTO_METRICS_DIR)")
+    parser.add_argument('--accounts', default=None,
+                        help="Accounts registry file (default: $ACCOUNTS_FILE or accounts.json, else UID/REGION/COOKIE)")
+    parser.add_argument('--shard', type=_parse_shard_arg, default=None,
+                        help="Only run shard i of n (e.g. 0/4); accounts are split by a stable hash of their UID")
+    parser.add_argument('--deadline', type=float, default=os.getenv('GENSHIN_AUTO_DEADLINE'),
+                        help="Finish within this many seconds, stopping early with partial results "
+                             "(default: $GENSHIN_AUTO_DEADLINE, no limit)")
+    args = parser.parse_args()
+
+    deadline.start(args.deadline)
+
+    metrics_dir = os.path.abspath(args.metrics_dir) if args.metrics_dir else None
+    accounts_file = os.path.abspath(args.accounts) if args.accounts else None
+
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    os.chdir(REPO_ROOT)
+
+    paths.set_shard(args.shard)
+    # Broken cookies are rejected here, before a single request is scheduled for them.
+    accounts, rejected = load_checked_accounts(accounts_file, shard=args.shard)
+    print(f"Loaded {len(accounts)} account(s)" + (f" for shard {args.shard[0]}/{args.shard[1]}" if args.shard else "")
+          + (f", rejected {len(rejected)} with an invalid cookie" if rejected else ""))
+
+    results = {}
+    if accounts or not rejected:
+        results = run_stages(args.stages, sync_logs=not args.no_logs, accounts=accounts, pipelined=args.pipelined)
+    if rejected:
+        results['accounts'] = False
+    metrics.set_info('rejected_accounts', [account.label for account, _ in rejected])
+    deadline_reached = deadline.expired()
+    metrics.set_info('deadline_seconds', args.deadline)
+    metrics.set_info('deadline_reached', deadline_reached)
+    metrics.export(metrics_dir)
+
+    print("\n=== Summary ===")
+    for name, success in results.items():
+        print(f"  - {name}: {'ok' if success else 'failed'}")
+    if deadline_reached:
+        print(f"Run deadline of {args.deadline:.0f}s reached; the results above are partial")
+
+    exit(0 if all(results.values()) else 1)
+
+
+if __name__ == '__main__':
+    main()
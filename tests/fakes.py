@@ -0,0 +1,131 @@
+"""Virtual clock and scripted faults for the retry-budget tests.
+
+Nothing here sleeps or touches the network: ``time.sleep`` and
+``time.monotonic`` advance a VirtualClock, every HTTP call goes to a
+FakeSession that plays back a script of responses, timeouts and disconnects,
+and git commands go to a FakeGit that can reject pushes. Each fake costs
+simulated time, so tests can bound how long a run would really take.
+"""
+
+import json
+import subprocess
+from contextlib import ExitStack
+from typing import Callable, List, Optional
+from unittest import mock
+
+import requests
+
+LATENCY = 0.2  # simulated seconds per HTTP request
+GIT_LATENCY = 1.0  # simulated seconds per git command
+
+
+class VirtualClock:
+    def __init__(self):
+        self.now = 0.0
+        self.slept = 0.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        seconds = max(seconds, 0.0)
+        self.slept += seconds
+        self.now += seconds
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+    def install(self, stack: ExitStack) -> 'VirtualClock':
+        stack.enter_context(mock.patch('time.monotonic', self.monotonic))
+        stack.enter_context(mock.patch('time.sleep', self.sleep))
+        # Worst-case jitter, so the bounds hold for every random draw.
+        stack.enter_context(mock.patch('utils.http_client.random.uniform', lambda low, high: high))
+        return self
+
+
+TIMEOUT = object()
+DISCONNECT = object()  # the connection drops after the request was sent
+
+
+def respond(retcode: int = 0, message: str = 'OK', status: int = 200, retry_after: Optional[float] = None):
+    def build(url: str) -> requests.Response:
+        response = requests.Response()
+        response.status_code = status
+        response.url = url
+        response.encoding = 'utf-8'
+        response.headers['Content-Type'] = 'application/json'
+        if retry_after is not None:
+            response.headers['Retry-After'] = str(retry_after)
+        response._content = json.dumps({'retcode': retcode, 'message': message}).encode('utf-8')
+        response._content_consumed = True
+        return response
+    return build
+
+
+def rate_limited(message: str = 'Redemption in cooldown'):
+    return respond(-2016, message)
+
+
+def server_error(status: int = 503, retry_after: Optional[float] = None):
+    return respond(-1, 'Service Unavailable', status=status, retry_after=retry_after)
+
+
+class FakeSession:
+    """Plays ``script`` back one request at a time, then repeats ``default``."""
+
+    def __init__(self, clock: VirtualClock, script: Optional[List] = None, default=respond()):
+        self.clock = clock
+        self.script = list(script or [])
+        self.default = default
+        self.requests: List[dict] = []
+
+    def request(self, method: str, url: str, timeout=None, **kwargs) -> requests.Response:
+        self.requests.append({'method': method, 'url': url, 'timeout': timeout, **kwargs})
+        fault = self.script.pop(0) if self.script else self.default
+        if fault is TIMEOUT:
+            self.clock.advance(max(timeout) if isinstance(timeout, tuple) else timeout)
+            raise requests.ReadTimeout(f"Read timed out ({url})")
+        if fault is DISCONNECT:
+            self.clock.advance(LATENCY)
+            raise requests.ConnectionError(f"Connection aborted ({url})")
+        self.clock.advance(LATENCY)
+        return fault(url)
+
+    def install(self, stack: ExitStack) -> 'FakeSession':
+        stack.enter_context(mock.patch('utils.http_client.get_session', return_value=self))
+        return self
+
+
+class FakeGit:
+    """Stands in for ``subprocess.run``; ``reject_pushes`` pushes fail before one is accepted."""
+
+    def __init__(self, clock: VirtualClock, reject_pushes: int = 0,
+                 hang: Optional[Callable[[List[str]], bool]] = None):
+        self.clock = clock
+        self.reject_pushes = reject_pushes
+        self.hang = hang
+        self.commands: List[List[str]] = []
+        self.timeouts: List[Optional[float]] = []
+
+    def run(self, command, capture_output=False, text=True, check=False, cwd=None, timeout=None):
+        self.commands.append(list(command))
+        self.timeouts.append(timeout)
+        if self.hang is not None and self.hang(command):
+            self.clock.advance(timeout)
+            raise subprocess.TimeoutExpired(command, timeout)
+        self.clock.advance(min(GIT_LATENCY, timeout) if timeout is not None else GIT_LATENCY)
+
+        returncode = 0
+        if command[:2] == ['git', 'push'] and self.reject_pushes > 0:
+            self.reject_pushes -= 1
+            returncode = 1
+        if returncode and check:
+            raise subprocess.CalledProcessError(returncode, command, stderr='! [rejected] (fetch first)')
+        return subprocess.CompletedProcess(command, returncode, stdout='' if text else b'', stderr='')
+
+    def count(self, *prefix: str) -> int:
+        return sum(1 for command in self.commands if command[:len(prefix)] == list(prefix))
+
+    def install(self, stack: ExitStack) -> 'FakeGit':
+        stack.enter_context(mock.patch('utils.logs_manager.subprocess.run', self.run))
+        return self
@@ -0,0 +1,70 @@
+"""Simulated cost of the logs branch fallbacks: rejected pushes and hung git commands."""
+
+import subprocess
+import unittest
+from contextlib import ExitStack
+from unittest import mock
+
+from tests.fakes import GIT_LATENCY, FakeGit, VirtualClock
+from utils import deadline
+from utils.constants import LOGS_PUSH_ATTEMPTS, GIT_COMMAND_TIMEOUT
+from utils.logs_manager import LogsBranchManager
+
+
+class LogsPushBudgetTest(unittest.TestCase):
+    def setUp(self):
+        self.stack = ExitStack()
+        self.addCleanup(self.stack.close)
+        self.clock = VirtualClock().install(self.stack)
+        deadline.start(None)
+        self.addCleanup(deadline.start, None)
+        self.manager = LogsBranchManager()
+
+    def git(self, **kwargs) -> FakeGit:
+        return FakeGit(self.clock, **kwargs).install(self.stack)
+
+    def test_rejected_push_is_rebased_and_retried(self):
+        git = self.git(reject_pushes=LOGS_PUSH_ATTEMPTS - 1)
+
+        self.manager._push_to_remote()
+
+        self.assertEqual(git.count('git', 'push'), LOGS_PUSH_ATTEMPTS)
+        self.assertEqual(git.count('git', 'pull', '--rebase'), LOGS_PUSH_ATTEMPTS - 1)
+        # One ls-remote, then a push and a rebase per rejected attempt.
+        self.assertLessEqual(self.clock.now, (1 + 2 * LOGS_PUSH_ATTEMPTS - 1) * GIT_LATENCY)
+
+    def test_push_gives_up_after_the_attempt_budget(self):
+        git = self.git(reject_pushes=LOGS_PUSH_ATTEMPTS + 5)
+
+        with self.assertRaises(subprocess.CalledProcessError):
+            self.manager._push_to_remote()
+
+        self.assertEqual(git.count('git', 'push'), LOGS_PUSH_ATTEMPTS)
+        self.assertEqual(git.count('git', 'pull', '--rebase'), LOGS_PUSH_ATTEMPTS - 1)
+        self.assertLessEqual(len(git.commands), 2 * LOGS_PUSH_ATTEMPTS)
+
+    def test_hung_fetch_costs_one_timeout(self):
+        git = self.git(hang=lambda command: command[:2] == ['git', 'fetch'])
+
+        with mock.patch('os.chdir'):
+            fetched = self.manager.fetch_existing_files(['*.log'])
+
+        self.assertEqual(fetched, {})
+        self.assertEqual(git.count('git', 'ls-tree'), 0)
+        self.assertLessEqual(self.clock.now, GIT_LATENCY + GIT_COMMAND_TIMEOUT)
+
+    def test_git_timeouts_shrink_to_the_run_deadline(self):
+        deadline.start(300, grace=60)
+        self.clock.advance(280)
+        git = self.git(hang=lambda command: command[:2] == ['git', 'push'])
+
+        with self.assertRaises(subprocess.TimeoutExpired):
+            self.manager._push_to_remote()
+
+        self.assertEqual(git.count('git', 'push'), 1)
+        self.assertLessEqual(max(timeout for timeout in git.timeouts if timeout is not None), 20)
+        self.assertLessEqual(self.clock.now, 300)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,193 @@
+"""Simulated run time and request counts of the redemption retry paths.
+
+Each test injects one kind of fault and asserts an upper bound on the virtual
+time and requests it costs, so a change that quietly adds retries or sleeps
+fails here instead of stretching real runs.
+"""
+
+import os
+import tempfile
+import unittest
+from contextlib import ExitStack
+from unittest import mock
+
+import requests
+
+from redeem import priority, redeem_code
+from redeem.records import CodeInfo
+from tests.fakes import (DISCONNECT, LATENCY, TIMEOUT, FakeSession, VirtualClock, rate_limited, respond, server_error)
+from utils import circuit_breaker, deadline, http_client, metrics
+from utils.accounts import Account
+from utils.constants import (HTTP_BACKOFF_BASE, HTTP_MAX_ATTEMPTS, HTTP_TIMEOUT, CIRCUIT_FAILURE_THRESHOLD,
+                             REDEEM_CODE_INTERVAL)
+
+SERVERS = ['os_usa', 'os_euro', 'os_asia', 'os_cht']
+
+
+def _codes(count: int):
+    return [CodeInfo(f"TESTCODE{index:04d}", SERVERS, 'Primogem ×60', f"{index + 1} days") for index in range(count)]
+
+
+def _worst_backoff(attempts: int) -> float:
+    return sum(HTTP_BACKOFF_BASE * 2 ** attempt for attempt in range(attempts - 1))
+
+
+class RedeemRetryBudgetTest(unittest.TestCase):
+    def setUp(self):
+        circuit_breaker.reset()
+        metrics.registry.reset()
+        redeem_code._last_sent.clear()
+        self.stack = ExitStack()
+        self.addCleanup(self.stack.close)
+        self.clock = VirtualClock().install(self.stack)
+        deadline.start(None)
+        self.addCleanup(deadline.start, None)
+
+    def session(self, script=None, default=respond()) -> FakeSession:
+        return FakeSession(self.clock, script, default).install(self.stack)
+
+    def test_rate_limit_waits_follow_the_message(self):
+        session = self.session([rate_limited('Please try again in 3 seconds'),
+                                rate_limited('Too many requests, try again in 10 seconds'),
+                                rate_limited('Redemption in cooldown')])
+
+        result = redeem_code.redeem_code('800000000', 'os_asia', 'TESTCODE0000')
+
+        self.assertEqual(result['retcode'], 0)
+        self.assertEqual(len(session.requests), 4)
+        # 3 + 1, 10 + 1, and the 5 second default when no wait is given.
+        self.assertLessEqual(self.clock.now, 4 + 11 + 5 + 4 * LATENCY + 1e-6)
+
+    def test_persistent_rate_limit_stops_after_four_requests(self):
+        session = self.session(default=rate_limited('Please try again in 30 seconds'))
+
+        result = redeem_code.redeem_code('800000000', 'os_asia', 'TESTCODE0000')
+
+        self.assertEqual(result['retcode'], -2016)
+        self.assertEqual(len(session.requests), 4)
+        self.assertLessEqual(self.clock.now, 3 * 31 + 4 * LATENCY + 1e-6)
+
+    def test_timeouts_are_retried_by_one_layer_only(self):
+        session = self.session(default=TIMEOUT)
+
+        result = redeem_code.redeem_code('800000000', 'os_asia', 'TESTCODE0000')
+
+        self.assertEqual(result['retcode'], -1)
+        self.assertEqual(len(session.requests), HTTP_MAX_ATTEMPTS)
+        bound = HTTP_MAX_ATTEMPTS * max(HTTP_TIMEOUT) + _worst_backoff(HTTP_MAX_ATTEMPTS)
+        self.assertLessEqual(self.clock.now, bound + 1e-6)
+
+    def test_server_errors_honour_retry_after_without_outer_retries(self):
+        session = self.session(default=server_error(503, retry_after=7))
+
+        result = redeem_code.redeem_code('800000000', 'os_asia', 'TESTCODE0000')
+
+        self.assertEqual(result, {'retcode': -1, 'message': 'Network error'})
+        self.assertEqual(len(session.requests), HTTP_MAX_ATTEMPTS)
+        self.assertLessEqual(self.clock.now, (HTTP_MAX_ATTEMPTS - 1) * 7 + HTTP_MAX_ATTEMPTS * LATENCY + 1e-6)
+
+    def test_attempt_metrics_count_the_requests_sent(self):
+        session = self.session([server_error(503, retry_after=1)])
+
+        redeem_code.redeem_code('800000000', 'os_asia', 'TESTCODE0000')
+        redeem_code.redeem_code('800000000', 'os_asia', 'TESTCODE0001')
+
+        self.assertEqual(len(session.requests), 3)
+        self.assertEqual(sum(metrics.registry.attempts.values()), len(session.requests))
+
+    def test_posts_are_not_resent_after_reaching_the_server(self):
+        session = self.session([DISCONNECT, server_error(502), server_error(503, retry_after=3)])
+
+        with self.assertRaises(requests.ConnectionError):
+            http_client.post('https://example.com/sign')
+        self.assertEqual(http_client.post('https://example.com/sign').status_code, 502)
+        self.assertEqual(http_client.post('https://example.com/sign').status_code, 200)
+
+        # Only the 503 with Retry-After is sent again.
+        self.assertEqual(len(session.requests), 4)
+
+    def test_open_circuit_stops_requests_during_an_outage(self):
+        session = self.session(default=server_error(502))
+        codes = _codes(12)
+
+        outcomes = redeem_code.redeem_multiple_codes('800000000', 'os_asia', 'cookie', codes)
+
+        self.assertEqual(len(outcomes), len(codes))
+        self.assertFalse(any(outcome.cacheable for outcome in outcomes))
+        self.assertEqual(len(session.requests), CIRCUIT_FAILURE_THRESHOLD * HTTP_MAX_ATTEMPTS)
+        per_code = _worst_backoff(HTTP_MAX_ATTEMPTS) + HTTP_MAX_ATTEMPTS * LATENCY + REDEEM_CODE_INTERVAL
+        self.assertLessEqual(self.clock.now, CIRCUIT_FAILURE_THRESHOLD * per_code + 1e-6)
+
+    def test_deadline_cuts_a_rate_limited_run_short(self):
+        session = self.session(default=rate_limited('Please try again in 60 seconds'))
+        deadline.start(120, grace=0)
+
+        outcomes = redeem_code.redeem_multiple_codes('800000000', 'os_asia', 'cookie', _codes(20))
+
+        self.assertEqual(len(outcomes), 20)
+        self.assertLessEqual(len(session.requests), 3)
+        self.assertLessEqual(self.clock.now, 120 + LATENCY + 1e-6)
+
+    def test_fleet_run_is_paced_per_cookie(self):
+        session = self.session([rate_limited('Please try again in 4 seconds')])
+        data_dir = self.stack.enter_context(tempfile.TemporaryDirectory())
+        self.stack.enter_context(mock.patch('utils.paths.REPO_ROOT', data_dir))
+        self.stack.enter_context(mock.patch.dict(os.environ, {'DISCORD_WEBHOOK_URL': ''}))
+        accounts = [Account(f"80000000{index}", 'os_asia', f"cookie-{index}", f"player{index}") for index in range(3)]
+        codes = _codes(4)
+
+        success = redeem_code.redeem_for_roles([(account, account) for account in accounts], codes)
+
+        self.assertTrue(success)
+        requests_sent = len(accounts) * len(codes) + 1
+        self.assertEqual(len(session.requests), requests_sent)
+        # Requests of different cookies overlap their pacing, so the run takes
+        # about one interval per code rather than one per request.
+        bound = len(codes) * REDEEM_CODE_INTERVAL + 5 + requests_sent * LATENCY
+        self.assertLessEqual(self.clock.now, bound + 1e-6)
+        for account in accounts:
+            self.assertEqual(len(redeem_code.get_existing_redeemed_codes(account.uid)), len(codes))
+
+    def test_most_urgent_code_goes_out_first(self):
+        session = self.session()
+        codes = [CodeInfo('LATERCODE01', SERVERS, 'Primogem ×60', 'Indefinite'),
+                 CodeInfo('CHEAPCODE01', SERVERS, 'Mora ×5,000', '1 days'),
+                 CodeInfo('VALUECODE01', SERVERS, 'Primogem ×100', '1 days')]
+
+        redeem_code.redeem_multiple_codes('800000000', 'os_asia', 'cookie', codes, interval=0)
+
+        sent = [request['params']['cdkey'] for request in session.requests]
+        self.assertEqual(sent, ['VALUECODE01', 'CHEAPCODE01', 'LATERCODE01'])
+
+    def test_equally_ranked_codes_go_out_code_major(self):
+        codes = [CodeInfo('BBBBBBBB01', SERVERS), CodeInfo('AAAAAAAA01', SERVERS)]
+
+        work = priority.schedule([codes, list(codes)])
+
+        self.assertEqual([(index, code.code) for index, code in work],
+                         [(0, 'AAAAAAAA01'), (1, 'AAAAAAAA01'), (0, 'BBBBBBBB01'), (1, 'BBBBBBBB01')])
+
+    def test_pacing_carries_over_from_a_cookie_renewal(self):
+        self.session()
+
+        redeem_code.try_renew_cookie('800000000', 'os_asia', 'cookie')
+        renewed_at = self.clock.now
+        redeem_code.redeem_multiple_codes('800000000', 'os_asia', 'cookie', _codes(1))
+
+        self.assertGreaterEqual(self.clock.now - renewed_at, REDEEM_CODE_INTERVAL)
+
+    def test_cookie_is_renewed_once_for_all_its_roles(self):
+        session = self.session()
+        data_dir = self.stack.enter_context(tempfile.TemporaryDirectory())
+        self.stack.enter_context(mock.patch('utils.paths.REPO_ROOT', data_dir))
+        account = Account('800000000', 'os_asia', 'cookie', 'player')
+        roles = [(account, account._replace(uid=f"80000000{index}", region=region))
+                 for index, region in enumerate(['os_asia', 'os_usa', 'os_euro'])]
+
+        self.assertTrue(redeem_code.redeem_for_roles(roles, []))
+
+        self.assertEqual(len(session.requests), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+"""Import-time regression check for the console-script entry modules."""
+import argparse
+import os
+import re
+import subprocess
+import sys
+from typing import Dict, Set, Tuple
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ENTRY_MODULES = [
+    'runner.run_all',
+    'runner.daemon',
+    'checkin.daily',
+    'redeem.redeem_code',
+    'mimotravel.nata_autotask',
+    'utils.logs_manager',
+]
+LAZY_MODULES = ['requests', 'urllib3', 'dotenv', 'utils.user_stats']
+DEFAULT_BUDGET_MS = 25.0
+
+_IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|\s*(\S+)\s*$')
+
+
+def measure_import(module: str) -> Tuple[float, Set[str]]:
+    env = {**os.environ, 'PYTHONPATH': REPO_ROOT}
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        capture_output=True,
+        text=True,
+        cwd=REPO_ROOT,
+        env=env
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr}")
+
+    cumulative_us = 0
+    imported = set()
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        name = match.group(3)
+        imported.add(name)
+        if name == module:
+            cumulative_us = int(match.group(2))
+    return cumulative_us / 1000, imported
+
+
+def check(repeat: int, budget_ms: float) -> Dict[str, str]:
+    failures = {}
+    for module in ENTRY_MODULES:
+        timings = []
+        imported = set()
+        for _ in range(repeat):
+            elapsed_ms, imported = measure_import(module)
+            timings.append(elapsed_ms)
+
+        best_ms = min(timings)
+        eager = [name for name in LAZY_MODULES if name in imported]
+        print(f"{module:<28} {best_ms:7.2f} ms")
+
+        if eager:
+            failures[module] = f"imports {', '.join(eager)} eagerly"
+        elif best_ms > budget_ms:
+            failures[module] = f"took {best_ms:.2f} ms (budget {budget_ms:.2f} ms)"
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fail when entry modules import slowly or load lazy dependencies eagerly")
+    parser.add_argument('--repeat', type=int, default=5, help="Runs per module; the fastest one is compared to the budget")
+    parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS, help="Cumulative import-time budget per module")
+    args = parser.parse_args()
+
+    failures = check(args.repeat, args.budget_ms)
+    for module, reason in failures.items():
+        print(f"FAIL {module}: {reason}")
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+"""Account registry with encrypted cookies and deterministic sharding."""
+
+import json
+import os
+import sys
+from typing import List, NamedTuple, Optional, Tuple
+
+from utils.constants import REPO_ROOT, ACCOUNTS_FILE
+
+ACCOUNTS_FILE_ENV = 'ACCOUNTS_FILE'
+ACCOUNTS_KEY_ENV = 'ACCOUNTS_KEY'
+
+
+class Account(NamedTuple):
+    uid: str
+    region: str
+    cookie: str
+    name: str = ''
+    games: Tuple[str, ...] = ()
+
+    @property
+    def label(self) -> str:
+        return self.name or self.uid or 'default'
+
+    def __repr__(self) -> str:
+        # Keep cookies out of tracebacks and logs.
+        return f"Account(uid={self.uid!r}, region={self.region!r}, name={self.name!r})"
+
+
+def parse_shard(spec: str) -> Tuple[int, int]:
+    """Parse an ``i/n`` shard spec, where ``0 <= i < n``."""
+    try:
+        index, count = (int(part) for part in spec.split('/'))
+    except ValueError:
+        raise ValueError(f"Invalid shard '{spec}', expected i/n (e.g. 0/4)")
+    if count < 1 or not 0 <= index < count:
+        raise ValueError(f"Invalid shard '{spec}', index must be in [0, {max(count, 1) - 1}]")
+    return index, count
+
+
+def shard_of(uid: str, count: int) -> int:
+    import hashlib
+
+    # A stable hash (not hash()) so every runner agrees on the split.
+    digest = hashlib.sha256(uid.encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big') % count
+
+
+def select_shard(accounts: List[Account], shard: Optional[Tuple[int, int]]) -> List[Account]:
+    if not shard or shard[1] == 1:
+        return accounts
+    index, count = shard
+    return [account for account in accounts if shard_of(account.uid, count) == index]
+
+
+def load_accounts(path: Optional[str] = None, shard: Optional[Tuple[int, int]] = None) -> List[Account]:
+    """Load the registry once into Account records, falling back to the environment."""
+    path = path or os.getenv(ACCOUNTS_FILE_ENV) or os.path.join(REPO_ROOT, ACCOUNTS_FILE)
+    if os.path.exists(path):
+        accounts = _load_registry(path)
+    else:
+        accounts = [account_from_env()]
+    return select_shard(accounts, shard)
+
+
+def load_checked_accounts(path: Optional[str] = None, shard: Optional[Tuple[int, int]] = None
+                          ) -> Tuple[List[Account], List[Tuple[Account, str]]]:
+    """Load the accounts and split off ``(account, reason)`` for those whose cookie fails the preflight check."""
+    from utils.cookies import preflight
+
+    return preflight(load_accounts(path, shard))
+
+
+def account_from_env() -> Account:
+    values = {var: os.getenv(var) for var in ('UID', 'REGION', 'COOKIE')}
+    if not values['COOKIE']:
+        raise ValueError("Missing required environment variable: COOKIE")
+    return Account(uid=values['UID'] or '', region=values['REGION'] or '', cookie=values['COOKIE'])
+
+
+def _load_registry(path: str) -> List[Account]:
+    with open(path, 'r', encoding='utf-8') as f:
+        registry = json.load(f)
+
+    accounts = []
+    seen = set()
+    fernet = None
+    for index, entry in enumerate(registry.get('accounts', [])):
+        uid = str(entry.get('uid', '')).strip()
+        region = str(entry.get('region', '')).strip()
+        if not uid or not region:
+            raise ValueError(f"Account #{index} in {path} needs both 'uid' and 'region'")
+        if uid in seen:
+            raise ValueError(f"Duplicate account uid {uid} in {path}")
+        seen.add(uid)
+
+        if 'cookie_encrypted' in entry:
+            fernet = fernet or _fernet()
+            cookie = fernet.decrypt(entry['cookie_encrypted'].encode('ascii')).decode('utf-8')
+        elif 'cookie_env' in entry:
+            cookie = os.getenv(entry['cookie_env'], '')
+        else:
+            cookie = entry.get('cookie', '')
+        if not cookie:
+            raise ValueError(f"Account {uid} in {path} has no cookie")
+
+        games = tuple(str(game) for game in entry.get('games', ()))
+        accounts.append(Account(uid=uid, region=region, cookie=cookie, name=str(entry.get('name', '')), games=games))
+    return accounts
+
+
+def _fernet(key: Optional[str] = None):
+    try:
+        from cryptography.fernet import Fernet
+    except ImportError:
+        raise RuntimeError("Encrypted cookies need the 'cryptography' package (pip install genshin-auto[accounts])")
+
+    key = key or os.getenv(ACCOUNTS_KEY_ENV)
+    if not key:
+        raise ValueError(f"Missing required environment variable: {ACCOUNTS_KEY_ENV}")
+    return Fernet(key.encode('ascii'))
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Manage the accounts registry")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('generate-key', help="Print a new key for ACCOUNTS_KEY")
+    subparsers.add_parser('encrypt', help="Encrypt a cookie read from stdin with ACCOUNTS_KEY")
+    list_parser = subparsers.add_parser('list', help="List the accounts of a shard and check their cookies "
+                                                      "(cookies are never printed)")
+    list_parser.add_argument('--shard', type=parse_shard, default=None, help="Shard i/n")
+    args = parser.parse_args()
+
+    if args.command == 'generate-key':
+        from cryptography.fernet import Fernet
+
+        print(Fernet.generate_key().decode('ascii'))
+    elif args.command == 'encrypt':
+        cookie = sys.stdin.read().strip()
+        print(_fernet().encrypt(cookie.encode('utf-8')).decode('ascii'))
+    elif args.command == 'list':
+        from utils.cookies import InvalidCookieError, parse_cookie
+
+        for account in load_accounts(shard=args.shard):
+            try:
+                parse_cookie(account.cookie)
+                status = "ok"
+            except InvalidCookieError as e:
+                status = f"invalid cookie: {e}"
+            print(f"{account.uid}\t{account.region}\t{account.name}\t{status}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,204 @@
+"""Structured check-in history with a day index for streak and gap queries."""
+
+import json
+import mmap
+import os
+import struct
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import Iterable, List, Optional
+
+from utils.constants import CHECKIN_HISTORY_FILE, CHECKIN_INDEX_FILE, CHECKIN_HISTORY_LOOKBACK_DAYS
+from utils.paths import data_path
+
+# The index is a header followed by one (offset, length) slot per game day since the first
+# recorded day, so a day's records are found by arithmetic instead of a scan.
+_MAGIC = b'GCIX'
+_VERSION = 1
+_HEADER = struct.Struct('<4sHHIQ')  # magic, version, reserved, first day, JSONL bytes covered
+_SLOT = struct.Struct('<QI')  # offset, length
+_GAME_TZ = timezone(timedelta(hours=8))
+
+
+def game_day(timestamp: Optional[float] = None) -> date:
+    return datetime.fromtimestamp(time.time() if timestamp is None else timestamp, _GAME_TZ).date()
+
+
+def make_record(uid: str, success: bool, message: str, timestamp: Optional[float] = None,
+                game: str = 'genshin') -> dict:
+    timestamp = int(time.time() if timestamp is None else timestamp)
+    return {'day': game_day(timestamp).isoformat(), 'ts': timestamp, 'uid': uid, 'game': game,
+            'success': success, 'message': message}
+
+
+def append_records(records: Iterable[dict], history_path: Optional[str] = None,
+                   index_path: Optional[str] = None) -> None:
+    history_path = history_path or data_path(CHECKIN_HISTORY_FILE)
+    index_path = index_path or data_path(CHECKIN_INDEX_FILE)
+
+    lines = [json.dumps(record, ensure_ascii=False) + '\n' for record in records]
+    if not lines:
+        return
+    with open(history_path, 'a', encoding='utf-8') as f:
+        f.writelines(lines)
+    update_index(history_path, index_path)
+
+
+def update_index(history_path: str, index_path: str) -> None:
+    """Index the JSONL bytes appended since the index was last written."""
+    size = os.path.getsize(history_path) if os.path.exists(history_path) else 0
+    first_day, covered, count = _read_header(index_path)
+    if covered > size:
+        # The history was replaced (e.g. restored from the logs branch); start over.
+        first_day, covered, count = None, 0, 0
+    if covered == size and os.path.exists(index_path):
+        return
+
+    changed = {}
+    if count:
+        changed[count - 1] = _read_slot(index_path, count - 1)
+    with open(history_path, 'rb') as f:
+        f.seek(covered)
+        offset = covered
+        for line in f:
+            length = len(line)
+            try:
+                day = date.fromisoformat(json.loads(line)['day']).toordinal()
+            except (ValueError, KeyError, TypeError):
+                offset += length
+                continue
+
+            if first_day is None:
+                first_day = day
+            # A day's records must stay contiguous, so a record dated before the
+            # last indexed day (clock change) is filed under that day.
+            position = max(day - first_day, count - 1)
+            count = max(count, position + 1)
+            slot = changed.setdefault(position, [0, 0])
+            if slot[1] == 0:
+                slot[0] = offset
+            slot[1] = offset + length - slot[0]
+            offset += length
+
+    mode = 'r+b' if covered and os.path.exists(index_path) else 'w+b'
+    with open(index_path, mode) as index:
+        index.seek(0, os.SEEK_END)
+        missing = _HEADER.size + count * _SLOT.size - index.tell()
+        if missing > 0:
+            index.write(b'\0' * missing)
+        for position, (slot_offset, slot_length) in changed.items():
+            index.seek(_HEADER.size + position * _SLOT.size)
+            index.write(_SLOT.pack(slot_offset, slot_length))
+        # The header goes last: after a crash the same bytes are simply indexed again.
+        index.seek(0)
+        index.write(_HEADER.pack(_MAGIC, _VERSION, 0, first_day or 0, size))
+
+
+def _read_header(index_path: str):
+    if not os.path.exists(index_path) or os.path.getsize(index_path) < _HEADER.size:
+        return None, 0, 0
+    with open(index_path, 'rb') as f:
+        magic, version, _, first_day, covered = _HEADER.unpack(f.read(_HEADER.size))
+        f.seek(0, os.SEEK_END)
+        count = (f.tell() - _HEADER.size) // _SLOT.size
+    if magic != _MAGIC or version != _VERSION:
+        return None, 0, 0
+    return (first_day if count else None), covered, count
+
+
+def _read_slot(index_path: str, position: int) -> List[int]:
+    with open(index_path, 'rb') as f:
+        f.seek(_HEADER.size + position * _SLOT.size)
+        return list(_SLOT.unpack(f.read(_SLOT.size)))
+
+
+class CheckinHistory:
+    """Read-only view over the history, one mmap per file."""
+
+    def __init__(self, history_path: Optional[str] = None, index_path: Optional[str] = None):
+        self.history_path = history_path or data_path(CHECKIN_HISTORY_FILE)
+        self.index_path = index_path or data_path(CHECKIN_INDEX_FILE)
+        self._history = self._index = None
+        self.first_day = self.day_count = 0
+        if not os.path.exists(self.history_path) or not os.path.getsize(self.history_path):
+            return
+
+        update_index(self.history_path, self.index_path)
+        self._history = _map(self.history_path)
+        self._index = _map(self.index_path)
+        _, _, _, self.first_day, _ = _HEADER.unpack_from(self._index)
+        self.day_count = (len(self._index) - _HEADER.size) // _SLOT.size
+
+    def __enter__(self) -> 'CheckinHistory':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        for mapped in (self._history, self._index):
+            if mapped is not None:
+                mapped.close()
+
+    @property
+    def last_day(self) -> Optional[date]:
+        return date.fromordinal(self.first_day + self.day_count - 1) if self.day_count else None
+
+    def records(self, day: date) -> List[dict]:
+        position = day.toordinal() - self.first_day
+        if not self.day_count or not 0 <= position < self.day_count:
+            return []
+        offset, length = _SLOT.unpack_from(self._index, _HEADER.size + position * _SLOT.size)
+        if not length:
+            return []
+        return [json.loads(line) for line in self._history[offset:offset + length].splitlines() if line.strip()]
+
+    def signed(self, day: date, uid: Optional[str] = None, game: str = 'genshin') -> bool:
+        return any(record.get('success') for record in self.records(day) if _matches(record, uid, game))
+
+    def last_success(self, uid: Optional[str] = None, game: str = 'genshin',
+                     lookback_days: int = CHECKIN_HISTORY_LOOKBACK_DAYS) -> Optional[dict]:
+        """Latest successful record within ``lookback_days`` of the last recorded day."""
+        day = self.last_day
+        if day is None:
+            return None
+        # Bounded so an account that never signed costs a few index slots, not the whole history.
+        oldest = max(self.first_day, day.toordinal() - lookback_days + 1)
+        while day.toordinal() >= oldest:
+            matches = [record for record in self.records(day)
+                       if record.get('success') and _matches(record, uid, game)]
+            if matches:
+                return matches[-1]
+            day -= timedelta(days=1)
+        return None
+
+    def streak(self, uid: Optional[str] = None, today: Optional[date] = None, game: str = 'genshin') -> int:
+        """Consecutive signed days ending today (or yesterday, if today has not run yet)."""
+        day = today or game_day()
+        if not self.signed(day, uid, game):
+            day -= timedelta(days=1)
+        count = 0
+        while day.toordinal() >= self.first_day and self.signed(day, uid, game):
+            count += 1
+            day -= timedelta(days=1)
+        return count
+
+    def gaps(self, year: int, month: int, uid: Optional[str] = None, today: Optional[date] = None,
+             game: str = 'genshin') -> List[date]:
+        """Days of the month, up to today, without a successful check-in."""
+        today = today or game_day()
+        day = date(year, month, 1)
+        missed = []
+        while day.month == month and day <= today:
+            if not self.signed(day, uid, game):
+                missed.append(day)
+            day += timedelta(days=1)
+        return missed
+
+
+def _matches(record: dict, uid: Optional[str], game: str) -> bool:
+    # Records written before multi-game check-in have no 'game' and are all Genshin.
+    return (uid is None or record.get('uid') == uid) and record.get('game', 'genshin') == game
+
+
+def _map(path: str) -> mmap.mmap:
+    with open(path, 'rb') as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
@@ -0,0 +1,90 @@
+"""Per-endpoint circuit breakers shared by every account in the process"""
+
+import threading
+import time
+from typing import Dict, Optional
+
+from utils.constants import CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_COOLDOWN
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(OSError):
+    """Raised instead of sending a request while the endpoint's circuit is open."""
+
+    def __init__(self, endpoint: str, retry_in: float):
+        super().__init__(f"Circuit open for {endpoint} after repeated failures, retrying in {retry_in:.0f}s")
+        self.endpoint = endpoint
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """Opens after ``threshold`` consecutive failed calls and lets a single
+    probe through once ``cooldown`` seconds have passed."""
+
+    def __init__(self, endpoint: str, threshold: int = CIRCUIT_FAILURE_THRESHOLD, cooldown: float = CIRCUIT_COOLDOWN):
+        self.endpoint = endpoint
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.short_circuited = 0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def before_call(self) -> None:
+        with self._lock:
+            if self.state == CLOSED:
+                return
+            retry_in = self.opened_at + self.cooldown - time.monotonic()
+            if self.state == OPEN and retry_in <= 0:
+                self.state = HALF_OPEN
+            if self.state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return
+            self.short_circuited += 1
+            raise CircuitOpenError(self.endpoint, max(retry_in, 0.0))
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.threshold:
+                if self.state != OPEN:
+                    print(f"Circuit opened for {self.endpoint} after {self.failures} failure(s)")
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+            self._probe_in_flight = False
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(endpoint: str) -> CircuitBreaker:
+    breaker = _breakers.get(endpoint)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.setdefault(endpoint, CircuitBreaker(endpoint))
+    return breaker
+
+
+def is_open(endpoint: str) -> bool:
+    breaker = _breakers.get(endpoint)
+    return breaker is not None and breaker.state != CLOSED
+
+
+def reset(endpoint: Optional[str] = None) -> None:
+    with _breakers_lock:
+        if endpoint is None:
+            _breakers.clear()
+        else:
+            _breakers.pop(endpoint, None)
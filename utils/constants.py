@@ -1,9 +1,30 @@
 """Constants used across the Genshin Auto Daily application"""
 
+import os
+
+# Paths
+REPO_ROOT = os.getenv('GENSHIN_AUTO_ROOT') or os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CHECKIN_LOG_FILE = "genshin-checkin.log"
+CHECKIN_HISTORY_FILE = "genshin-checkin.jsonl"
+CHECKIN_INDEX_FILE = "genshin-checkin.idx"
+CHECKIN_HISTORY_LOOKBACK_DAYS = 31  # days searched back for the last successful check-in
+STATE_FILE = "genshin-state.sqlite"
+CHECKIN_REWARDS_FILE = "checkin-rewards.json"  # legacy, imported into STATE_FILE
+REDEEMED_CODES_FILE = "redeemed_codes.txt"
+REDEEM_RESULTS_FILE = "redeem-results.jsonl"
+GAME_ROLES_FILE = "game-roles.json"  # legacy, imported into STATE_FILE
+NOTIFY_LEDGER_FILE = "notifications.json"  # legacy, imported into STATE_FILE
+ACCOUNTS_FILE = "accounts.json"
+EXTRA_CODES_FILE = "extra-codes.txt"  # hand-maintained codes, read as an extra code source
+
 # API URLs
-CHECKIN_API_URL = "https://sg-hk4e-api.hoyolab.com/event/sol/sign"
+CHECKIN_API_BASE = "https://sg-hk4e-api.hoyolab.com/event/sol"
+CHECKIN_API_URL = f"{CHECKIN_API_BASE}/sign"
+STARRAIL_CHECKIN_API_BASE = "https://sg-public-api.hoyolab.com/event/luna/os"
+ZZZ_CHECKIN_API_BASE = "https://sg-public-api.hoyolab.com/event/luna/zzz/os"
 REDEEM_API_URL = "https://public-operation-hk4e.hoyoverse.com/common/apicdkey/api/webExchangeCdkey"
 USER_STATS_API_URL = "https://bbs-api-os.hoyolab.com/game_record/genshin/api/index"
+GAME_ROLES_API_URL = "https://api-account-os.hoyolab.com/binding/api/getUserGameRolesByCookie"
 WIKI_URL = "https://genshin-impact.fandom.com/wiki/Promotional_Code"
 WIKI_API_URL = "https://genshin-impact.fandom.com/api.php?action=parse&page=Promotional_Code&prop=wikitext&format=json"
 
@@ -22,11 +43,89 @@ MIMO_RECEIVE_POINT_API_URL = "https://sg-public-api.hoyolab.com/event/e2023mimot
 
 # Activity IDs
 DAILY_CHECKIN_ACT_ID = "e202102251931481"
+STARRAIL_CHECKIN_ACT_ID = "e202303301540311"
+ZZZ_CHECKIN_ACT_ID = "e202406031448091"
+GENSHIN_GAME_BIZ = "hk4e_global"
+
+# Persistent state
+STATE_SCHEMA_VERSION = 1
+STATE_MAX_TTL = 90 * 86400  # default lifetime of a state entry
+USER_STATS_TTL = 6 * 3600  # player stats shown in notifications are refreshed this often
+WIKI_CODES_TTL = 86400  # how long a code source's last list stands in while it is unreachable
+
+# Cookies
+REQUIRED_COOKIE_KEYS = ("ltuid_v2", "ltmid_v2", "ltoken_v2", "account_id_v2", "account_mid_v2", "cookie_token_v2")
+
+# Game roles
+GAME_ROLES_TTL = 7 * 86400  # seconds a cookie's role list is trusted before it is looked up again
+
+# Multi-game check-in
+DEFAULT_CHECKIN_GAMES = ("genshin",)  # overridden by CHECKIN_GAMES or an account's "games"
+CHECKIN_WORKERS = 8  # account x game sign-ins in flight at once
+CHECKIN_REPORT_MAX_LINES = 25
 
 # Status codes
 CHECKIN_SUCCESS_CODES = {0, -5003}
 REDEEM_SUCCESS_CODES = {0, -2017, -1007, -2001}
 RATE_LIMIT_CODE = -2016
+COOKIE_EXPIRED_CODE = -1071
+
+# Code details listed in one Discord redemption report
+REDEEM_REPORT_MAX_DETAILS = 25
+
+# Code sources
+CODE_SOURCES_DEFAULT = "wiki"  # overridden by REDEEM_CODE_SOURCES
+CODE_SOURCE_TIMEOUT = 30.0  # seconds a source gets before the merge goes on without it
+
+# Rough worth of redeemable items in Primogems, used to order codes by value
+REDEEM_REWARD_VALUES = {
+    "intertwined fate": 160.0,
+    "acquaint fate": 160.0,
+    "primogem": 1.0,
+    "hero's wit": 4.0,
+    "adventurer's experience": 1.0,
+    "mystic enhancement ore": 2.0,
+    "fine enhancement ore": 0.5,
+    "mora": 0.001,
+}
+
+# Pause between two redemption requests of the same account
+REDEEM_CODE_INTERVAL = 1
+
+# HTTP client
+HTTP_TIMEOUT = (10, 30)  # (connect, read) seconds
+HTTP_MAX_ATTEMPTS = 3
+HTTP_BACKOFF_BASE = 1.0
+HTTP_BACKOFF_CAP = 30.0
+HTTP_POOL_HOSTS = 10
+HTTP_POOL_MAXSIZE = 10
+HTTP_RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Circuit breaker
+CIRCUIT_FAILURE_THRESHOLD = 5  # consecutive failed calls to one endpoint before it opens
+CIRCUIT_COOLDOWN = 60.0  # seconds before a half-open probe is let through
+
+# Run deadline
+RUN_DEADLINE_GRACE = 120.0  # seconds kept free after the stages for committing logs
+GIT_COMMAND_TIMEOUT = 120.0
+
+# Metrics
+METRICS_LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Profiling
+PROFILE_TOP_ENTRIES = 40
+
+# Log archival
+LOG_SEGMENT_MAX_BYTES = 256 * 1024
+LOG_ARCHIVE_CODEC = "gzip"  # "gzip" or "zstd" (requires the zstandard package)
+LOGS_PUSH_ATTEMPTS = 3  # pushes to the logs branch, rebasing onto other shards in between
+
+# Daemon scheduling
+DAILY_RESET_UTC_HOUR = 16  # HoYoLAB resets at 00:00 UTC+8
+DAEMON_JITTER_WINDOW = 2 * 3600  # accounts are spread over this many seconds after each slot
+DAEMON_STAGE_PERIODS = {'checkin': 24 * 3600, 'redeem': 6 * 3600, 'mimo': 12 * 3600}
+DAEMON_CODES_TTL = 30 * 60  # reuse a scraped code list for this long
+DAEMON_LOGS_INTERVAL = 3600  # commit changed logs at most this often
 
 # Headers
 DEFAULT_HEADERS = {
@@ -52,6 +151,8 @@ CHECKIN_HEADERS = {
 DISCORD_BOT_NAME = "Genshin Auto Bot"
 DISCORD_AVATAR_URL = "https://cdn2.steamgriddb.com/icon_thumb/73e5080f0f3804cb9cf470a8ce895dac.png"
 GENSHIN_FAVICON_URL = "https://cdn2.steamgriddb.com/icon_thumb/73e5080f0f3804cb9cf470a8ce895dac.png"
+NOTIFY_DEDUP_WINDOW = 6 * 3600  # seconds an identical notification is held back (DISCORD_DEDUP_WINDOW, 0 disables)
+NOTIFY_LEDGER_RETENTION = 7 * 86400  # how long a folded count waits for the next post of its message
 
 # Level colors for Discord embeds
 LEVEL_COLORS = {
@@ -0,0 +1,71 @@
+"""HoYoLAB cookie parsing and the preflight check run before any request."""
+
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Tuple
+
+from utils.accounts import Account
+from utils.constants import REQUIRED_COOKIE_KEYS
+
+
+class InvalidCookieError(ValueError):
+    pass
+
+
+class CookieRecord(NamedTuple):
+    ltuid: str
+    ltmid: str
+    ltoken: str
+    account_id: str
+    account_mid: str
+    cookie_token: str
+
+    def __repr__(self) -> str:
+        # The tokens are credentials; only the account identifiers are shown.
+        return f"CookieRecord(account_id={self.account_id!r}, account_mid={self.account_mid!r})"
+
+
+def split_cookie(cookie: str) -> Dict[str, str]:
+    values: Dict[str, str] = {}
+    for part in cookie.split(';'):
+        key, separator, value = part.strip().partition('=')
+        if not separator or not key.strip():
+            continue
+        key, value = key.strip(), value.strip()
+        if values.get(key, value) != value:
+            raise InvalidCookieError(f"'{key}' appears twice with different values")
+        values[key] = value
+    return values
+
+
+@lru_cache(maxsize=None)
+def parse_cookie(cookie: str) -> CookieRecord:
+    """Parse and check a cookie string; raises InvalidCookieError naming what is wrong."""
+    values = split_cookie(cookie)
+    missing = [key for key in REQUIRED_COOKIE_KEYS if not values.get(key)]
+    if missing:
+        raise InvalidCookieError(f"missing {', '.join(missing)}")
+
+    record = CookieRecord(*(values[key] for key in REQUIRED_COOKIE_KEYS))
+    if not record.ltuid.isdigit():
+        raise InvalidCookieError("ltuid_v2 is not a number")
+    # The two halves come from different sites; a mismatch would otherwise only show up as
+    # -1071 after a round of retried requests.
+    if record.ltuid != record.account_id:
+        raise InvalidCookieError("ltuid_v2 and account_id_v2 belong to different accounts")
+    if record.ltmid != record.account_mid:
+        raise InvalidCookieError("ltmid_v2 and account_mid_v2 belong to different accounts")
+    return record
+
+
+def preflight(accounts: List[Account]) -> Tuple[List[Account], List[Tuple[Account, str]]]:
+    """Split accounts into those with a usable cookie and ``(account, reason)`` for the rest."""
+    valid, rejected = [], []
+    for account in accounts:
+        try:
+            parse_cookie(account.cookie)
+            valid.append(account)
+        except InvalidCookieError as e:
+            who = f"{account.label} (uid {account.uid})" if account.name and account.uid else account.label
+            print(f"Skipping account {who}: invalid cookie ({e})")
+            rejected.append((account, str(e)))
+    return valid, rejected
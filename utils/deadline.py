@@ -0,0 +1,65 @@
+"""Run-wide deadline that every network call, retry sleep and git command fits into."""
+
+import time
+from typing import Optional
+
+from utils.constants import RUN_DEADLINE_GRACE
+
+# Stage work stops at the work deadline, ``grace`` seconds early, so partial results can still be
+# committed; only git commands may run on until the hard deadline.
+_work_deadline: Optional[float] = None
+_hard_deadline: Optional[float] = None
+
+
+class DeadlineExceeded(TimeoutError):
+    pass
+
+
+def start(seconds: Optional[float], grace: float = RUN_DEADLINE_GRACE) -> None:
+    global _work_deadline, _hard_deadline
+    if seconds is None:
+        _work_deadline = _hard_deadline = None
+        return
+    now = time.monotonic()
+    _hard_deadline = now + seconds
+    _work_deadline = now + max(seconds - grace, 0.0)
+
+
+def remaining(hard: bool = False) -> Optional[float]:
+    deadline = _hard_deadline if hard else _work_deadline
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def expired(hard: bool = False) -> bool:
+    left = remaining(hard)
+    return left is not None and left <= 0
+
+
+def check(needed: float = 0.0, hard: bool = False) -> None:
+    """Raise DeadlineExceeded unless ``needed`` more seconds fit before the deadline."""
+    left = remaining(hard)
+    if left is not None and left <= needed:
+        raise DeadlineExceeded("Run deadline reached" if left <= 0 else f"Run deadline is {left:.1f}s away")
+
+
+def clamp_timeout(timeout, hard: bool = False):
+    """Shrink a ``requests``/``subprocess`` timeout (a number or a tuple) to the time left."""
+    left = remaining(hard)
+    if left is None:
+        return timeout
+    check(hard=hard)
+    if isinstance(timeout, tuple):
+        return tuple(min(part, left) for part in timeout)
+    return min(timeout, left) if timeout is not None else left
+
+
+def sleep(seconds: float) -> float:
+    """``time.sleep`` cut short at the work deadline; returns the time actually slept."""
+    left = remaining()
+    if left is not None:
+        seconds = min(seconds, max(left, 0.0))
+    if seconds > 0:
+        time.sleep(seconds)
+    return max(seconds, 0.0)
@@ -1,45 +1,112 @@
 import os
+import threading
+import time
 from datetime import datetime
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 
-import requests
-from user_stats import get_user_stats
+from utils.constants import (DISCORD_BOT_NAME, DISCORD_AVATAR_URL, GENSHIN_FAVICON_URL, LEVEL_COLORS, DEFAULT_COLOR,
+                             NOTIFY_DEDUP_WINDOW, NOTIFY_LEDGER_RETENTION)
 
-try:
-    from constants import DISCORD_BOT_NAME, DISCORD_AVATAR_URL, GENSHIN_FAVICON_URL, LEVEL_COLORS, DEFAULT_COLOR
-except ImportError:
-    DISCORD_BOT_NAME = "Genshin Auto Bot"
-    DISCORD_AVATAR_URL = "https://genshin.hoyoverse.com/favicon.ico"
-    GENSHIN_FAVICON_URL = "https://genshin.hoyoverse.com/favicon.ico"
-    LEVEL_COLORS = {55: 0xFFD700, 45: 0x9932CC, 35: 0x4169E1, 25: 0x32CD32, 0: 0x808080}
-    DEFAULT_COLOR = 0x5865F2
+if TYPE_CHECKING:
+    from utils.accounts import Account
 
+_ledger_lock = threading.Lock()
 
-def send_discord_notification(content: str) -> bool:
+
+def send_discord_notification(content: str, account: Optional['Account'] = None) -> bool:
+    """Post to the Discord webhook, unless the same account posted the same content within the dedup window."""
     webhook_url = os.getenv('DISCORD_WEBHOOK_URL')
     
     if not webhook_url:
         return False
-        
-    user_data = get_user_stats()
-    message = _build_message(content, user_data)
-    payload = {
-        "content": message,
-        "username": DISCORD_BOT_NAME,
-        "avatar_url": DISCORD_AVATAR_URL
-    }
-    
-    if user_data:
-        payload["embeds"] = [_create_embed(content, user_data)]
-        payload["content"] = "" 
-    
+
+    key = _ledger_key(content, account)
+    previous = _claim_ledger(key)
+    if previous is None:
+        print("Skipped a Discord notification identical to one sent recently")
+        return False
+    if previous['suppressed']:
+        content += f"\n\n_(repeated {previous['suppressed']} more time(s) since the last notification)_"
+
+    import requests
+    from utils import deadline, http_client
+    from utils.user_stats import get_user_stats
+
+    sent = False
     try:
-        response = requests.post(webhook_url, json=payload)
+        user_data = get_user_stats(account)
+        message = _build_message(content, user_data)
+        payload = {
+            "content": message,
+            "username": DISCORD_BOT_NAME,
+            "avatar_url": DISCORD_AVATAR_URL
+        }
+
+        if user_data:
+            payload["embeds"] = [_create_embed(content, user_data)]
+            payload["content"] = ""
+
+        response = http_client.post(webhook_url, json=payload)
         response.raise_for_status()
+        sent = True
         return True
-        
-    except requests.exceptions.RequestException:
+
+    except (requests.exceptions.RequestException, http_client.CircuitOpenError, deadline.DeadlineExceeded):
         return False
+    finally:
+        if not sent:
+            _release_ledger(key, previous)
+
+
+def _dedup_window() -> float:
+    value = os.getenv('DISCORD_DEDUP_WINDOW')
+    try:
+        return float(value) if value else NOTIFY_DEDUP_WINDOW
+    except ValueError:
+        return NOTIFY_DEDUP_WINDOW
+
+
+def _ledger_key(content: str, account: Optional['Account']) -> str:
+    import hashlib
+
+    owner = (account.uid or account.label) if account is not None else '-'
+    return f"{owner}:{hashlib.sha256(content.encode('utf-8')).hexdigest()[:16]}"
+
+
+def _claim_ledger(key: str) -> Optional[dict]:
+    """None to drop the notification, else the ledger entry its send replaces."""
+    from utils import state
+
+    window = _dedup_window()
+    if window <= 0:
+        return {'sent': 0, 'suppressed': 0}
+    with _ledger_lock:
+        entry = state.get(state.NOTIFICATIONS, key) or {'sent': 0, 'suppressed': 0}
+        if time.time() - entry['sent'] < window:
+            entry['suppressed'] += 1
+            state.put(state.NOTIFICATIONS, key, entry, ttl=_ledger_ttl(window))
+            return None
+        # The send is recorded before posting, so a concurrent worker with the same message holds back.
+        state.put(state.NOTIFICATIONS, key, {'sent': int(time.time()), 'suppressed': 0}, ttl=_ledger_ttl(window))
+        return entry
+
+
+def _release_ledger(key: str, previous: dict) -> None:
+    """Put back the entry a failed send claimed, keeping the repeats suppressed meanwhile."""
+    from utils import state
+
+    window = _dedup_window()
+    if window <= 0:
+        return
+    with _ledger_lock:
+        claimed = state.get(state.NOTIFICATIONS, key, {})
+        entry = {**previous, 'suppressed': previous['suppressed'] + claimed.get('suppressed', 0)}
+        state.put(state.NOTIFICATIONS, key, entry, ttl=_ledger_ttl(window))
+
+
+def _ledger_ttl(window: float) -> float:
+    # Long enough for a folded count to reach the next post of its message.
+    return max(window, NOTIFY_LEDGER_RETENTION)
 
 
 def _build_message(content: str, user_data: Optional[dict]) -> str:
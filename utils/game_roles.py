@@ -0,0 +1,83 @@
+"""Genshin roles owned by a HoYoLAB cookie, looked up once and cached."""
+
+import time
+from typing import List, NamedTuple, Optional
+
+from utils import http_client, state
+from utils.accounts import Account
+from utils.constants import GAME_ROLES_API_URL, GAME_ROLES_TTL, GENSHIN_GAME_BIZ, DEFAULT_HEADERS
+
+
+class GameRole(NamedTuple):
+    uid: str
+    region: str
+    nickname: str = ''
+    level: int = 0
+
+
+def cookie_fingerprint(cookie: str) -> str:
+    import hashlib
+    from utils.cookies import InvalidCookieError, parse_cookie
+
+    # Keyed by the HoYoLAB account rather than the raw string, so a refreshed
+    # cookie of the same account keeps its cached roles.
+    try:
+        identity = 'account:' + parse_cookie(cookie).account_id
+    except InvalidCookieError:
+        identity = cookie
+    return hashlib.sha256(identity.encode('utf-8')).hexdigest()[:16]
+
+
+def get_roles(cookie: str) -> List[GameRole]:
+    """Every Genshin role of the cookie; empty when the lookup fails and nothing is cached."""
+    fingerprint = cookie_fingerprint(cookie)
+    entry = state.get(state.GAME_ROLES, fingerprint)
+    if entry and time.time() - entry.get('ts', 0) < GAME_ROLES_TTL:
+        return [GameRole(**role) for role in entry['roles']]
+
+    roles = _fetch_roles(cookie)
+    if roles is None:
+        # A stale list is still better than none while the API is unavailable.
+        return [GameRole(**role) for role in entry['roles']] if entry else []
+
+    state.put(state.GAME_ROLES, fingerprint, {'ts': int(time.time()), 'roles': [role._asdict() for role in roles]})
+    return roles
+
+
+def expand_roles(account: Account) -> List[Account]:
+    """The account's own role first, then every other role its cookie owns, as accounts."""
+    roles = get_roles(account.cookie)
+    own = [account] if account.uid and account.region else []
+    others = [account._replace(uid=role.uid, region=role.region,
+                               name=f"{account.label} · {role.uid}" if account.uid or account.name else '')
+              for role in roles if role.uid != account.uid]
+    return own + others
+
+
+def primary_role(account: Account) -> Optional[GameRole]:
+    """The role to use when an account names no UID/region of its own."""
+    if account.uid and account.region:
+        return GameRole(account.uid, account.region)
+    roles = get_roles(account.cookie)
+    return roles[0] if roles else None
+
+
+def _fetch_roles(cookie: str) -> Optional[List[GameRole]]:
+    try:
+        response = http_client.get(GAME_ROLES_API_URL, params={'game_biz': GENSHIN_GAME_BIZ},
+                                   headers={**DEFAULT_HEADERS, 'Cookie': cookie})
+        response.raise_for_status()
+        result = response.json()
+        if result.get('retcode') != 0:
+            print(f"Game role lookup failed: {result.get('message', 'Unknown response')}")
+            return None
+        roles = (result.get('data') or {}).get('list') or []
+        # The role picked in HoYoLAB goes first; it is the one stats default to.
+        roles.sort(key=lambda role: not role.get('is_chosen'))
+        return [GameRole(uid=str(role.get('game_uid', '')), region=role.get('region', ''),
+                         nickname=role.get('nickname', ''), level=role.get('level', 0))
+                for role in roles if role.get('game_uid') and role.get('region')]
+    except Exception as e:
+        print(f"Game role lookup failed: {e}")
+        return None
+
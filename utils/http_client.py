@@ -0,0 +1,200 @@
+"""Shared HTTP client with per-host connection pooling, timeouts and retries"""
+
+from __future__ import annotations
+
+import os
+import random
+import threading
+import time
+from typing import TYPE_CHECKING, Optional
+from urllib.parse import urlsplit, urlunsplit
+
+from utils import circuit_breaker, deadline, metrics
+from utils.circuit_breaker import CircuitOpenError
+from utils.constants import (
+    HTTP_TIMEOUT, HTTP_MAX_ATTEMPTS, HTTP_BACKOFF_BASE, HTTP_BACKOFF_CAP,
+    HTTP_POOL_HOSTS, HTTP_POOL_MAXSIZE, HTTP_RETRY_STATUS_CODES
+)
+
+if TYPE_CHECKING:
+    import requests
+
+
+_IDEMPOTENT_METHODS = {'GET', 'HEAD', 'OPTIONS'}
+
+_session = None
+_session_lock = threading.Lock()
+
+# Redirects every outbound call to a stand-in server (see bench/mock_server.py).
+_base_url_override = os.getenv('GENSHIN_AUTO_BASE_URL')
+
+
+def set_base_url_override(base_url: Optional[str]) -> None:
+    global _base_url_override
+    _base_url_override = base_url
+
+
+def get_session() -> requests.Session:
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _create_session()
+    return _session
+
+
+def close_session() -> None:
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+def _create_session() -> requests.Session:
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    # One urllib3 pool per host keeps connections alive across stages and accounts.
+    adapter = HTTPAdapter(pool_connections=HTTP_POOL_HOSTS, pool_maxsize=HTTP_POOL_MAXSIZE)
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def request(method: str, url: str, *, timeout=None, max_attempts: Optional[int] = None, **kwargs) -> requests.Response:
+    """Send a request through the shared session, retrying transient failures."""
+    import requests
+
+    method = method.upper()
+    target_url = _resolve_url(url)
+    attempts = max_attempts or HTTP_MAX_ATTEMPTS
+    breaker = circuit_breaker.get_breaker(metrics.endpoint_label(url))
+    start = time.perf_counter()
+
+    try:
+        deadline.check()
+        breaker.before_call()
+    except CircuitOpenError:
+        metrics.record_call(url, 'CircuitOpen', None, 0.0, 0)
+        raise
+    except deadline.DeadlineExceeded:
+        metrics.record_call(url, 'DeadlineExceeded', None, 0.0, 0)
+        raise
+
+    session = get_session()
+    for attempt in range(attempts):
+        is_last = attempt == attempts - 1
+        try:
+            request_timeout = deadline.clamp_timeout(timeout or HTTP_TIMEOUT)
+        except deadline.DeadlineExceeded as e:
+            # Only reachable after a failed attempt, so it counts as a failed call.
+            breaker.record_failure()
+            _record(url, start, attempt, error=e)
+            raise
+        # Other methods are only resent when the request never reached the server, or on 429/503
+        # with Retry-After, so a POST is never sent twice.
+        idempotent = method in _IDEMPOTENT_METHODS
+        try:
+            response = session.request(method, target_url, timeout=request_timeout, **kwargs)
+        except requests.ConnectionError as e:
+            if is_last or not (idempotent or _never_sent(e)):
+                breaker.record_failure()
+                _record(url, start, attempt + 1, error=e)
+                raise
+            delay = backoff_delay(attempt)
+        except requests.Timeout as e:
+            if is_last or not idempotent:
+                breaker.record_failure()
+                _record(url, start, attempt + 1, error=e)
+                raise
+            delay = backoff_delay(attempt)
+        except requests.RequestException as e:
+            breaker.record_failure()
+            _record(url, start, attempt + 1, error=e)
+            raise
+        else:
+            if is_last or not _retryable_response(response, idempotent):
+                if response.status_code in HTTP_RETRY_STATUS_CODES:
+                    breaker.record_failure()
+                else:
+                    breaker.record_success()
+                _record(url, start, attempt + 1, response=response)
+                return response
+            delay = _retry_after(response) or backoff_delay(attempt)
+            response.close()
+
+        try:
+            deadline.check(delay)
+        except deadline.DeadlineExceeded as e:
+            breaker.record_failure()
+            _record(url, start, attempt + 1, error=e)
+            raise
+        metrics.record_sleep('backoff', delay, url)
+        time.sleep(delay)
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    return request('GET', url, **kwargs)
+
+
+def post(url: str, **kwargs) -> requests.Response:
+    return request('POST', url, **kwargs)
+
+
+def backoff_delay(attempt: int) -> float:
+    # Full jitter: spread retries uniformly so accounts do not retry in lockstep.
+    return random.uniform(0, min(HTTP_BACKOFF_CAP, HTTP_BACKOFF_BASE * 2 ** attempt))
+
+
+def _record(url: str, start: float, attempts: int, response=None, error: Optional[Exception] = None) -> None:
+    """Count a finished call; ``attempts`` is the number of requests actually sent."""
+    latency = time.perf_counter() - start
+    if response is None:
+        metrics.record_call(url, type(error).__name__, None, latency, attempts)
+    else:
+        metrics.record_call(url, response.status_code, _peek_retcode(response), latency, attempts)
+
+
+def _never_sent(error: Exception) -> bool:
+    """Whether a connection error happened before any byte of the request was sent."""
+    import requests
+    from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    reason = getattr(error.args[0], 'reason', None) if error.args else None
+    return isinstance(reason, (NewConnectionError, ConnectTimeoutError))
+
+
+def _retryable_response(response: requests.Response, idempotent: bool) -> bool:
+    if response.status_code not in HTTP_RETRY_STATUS_CODES:
+        return False
+    # The server may have acted on a POST before failing; only an explicit retry request is safe.
+    return idempotent or (response.status_code in {429, 503} and _retry_after(response) is not None)
+
+
+def _peek_retcode(response: requests.Response):
+    if 'json' not in response.headers.get('Content-Type', ''):
+        return None
+    try:
+        body = response.json()
+    except ValueError:
+        return None
+    return body.get('retcode') if isinstance(body, dict) else None
+
+
+def _resolve_url(url: str) -> str:
+    if not _base_url_override:
+        return url
+    base = urlsplit(_base_url_override)
+    parts = urlsplit(url)
+    return urlunsplit((base.scheme, base.netloc, parts.path, parts.query, parts.fragment))
+
+
+def _retry_after(response: requests.Response) -> Optional[float]:
+    try:
+        return min(float(response.headers.get('Retry-After', '')), HTTP_BACKOFF_CAP)
+    except ValueError:
+        return None
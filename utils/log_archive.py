@@ -0,0 +1,92 @@
+import glob
+import gzip
+import io
+import os
+import shutil
+from datetime import datetime
+from typing import IO, Iterator, List, Optional
+
+from utils.constants import LOG_SEGMENT_MAX_BYTES, LOG_ARCHIVE_CODEC
+
+
+_SEGMENT_SUFFIXES = {"gzip": ".gz", "zstd": ".zst"}
+_GZIP_MAGIC = b"\x1f\x8b"
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+
+def list_segments(log_path: str) -> List[str]:
+    """Return the closed, compressed segments of ``log_path``, newest first."""
+    candidates = glob.glob(glob.escape(log_path) + ".*")
+    suffixes = tuple(_SEGMENT_SUFFIXES.values())
+    # Segment names embed a sortable timestamp, so reverse order is newest first.
+    return sorted((path for path in candidates if path.endswith(suffixes)), reverse=True)
+
+
+def open_log(path: str) -> IO[str]:
+    """Open a plain or compressed log file as a streaming text reader."""
+    return io.TextIOWrapper(_open_binary(path), encoding='utf-8')
+
+
+def iter_log_lines(log_path: str, include_archived: bool = True) -> Iterator[str]:
+    """Yield the full history of ``log_path``: the active file, then every closed segment."""
+    paths = [log_path] if os.path.exists(log_path) else []
+    if include_archived:
+        paths.extend(list_segments(log_path))
+
+    for path in paths:
+        with open_log(path) as f:
+            for line in f:
+                yield line if line.endswith('\n') else line + '\n'
+
+
+def rotate_log(log_path: str, max_bytes: int = LOG_SEGMENT_MAX_BYTES, codec: str = LOG_ARCHIVE_CODEC) -> Optional[str]:
+    """Close the active log into a compressed segment once it grows past ``max_bytes``."""
+    if not os.path.exists(log_path) or os.path.getsize(log_path) <= max_bytes:
+        return None
+
+    codec = _resolve_codec(codec)
+    timestamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+    segment_path = f"{log_path}.{timestamp}{_SEGMENT_SUFFIXES[codec]}"
+    temp_path = segment_path + ".tmp"
+
+    with open(log_path, 'rb') as source, _open_writer(temp_path, codec) as destination:
+        shutil.copyfileobj(source, destination)
+    os.replace(temp_path, segment_path)
+
+    with open(log_path, 'w', encoding='utf-8'):
+        pass
+    return segment_path
+
+
+def _zstandard():
+    try:
+        import zstandard
+    except ImportError:
+        return None
+    return zstandard
+
+
+def _resolve_codec(codec: str) -> str:
+    if codec == "zstd" and _zstandard() is None:
+        return "gzip"
+    return codec if codec in _SEGMENT_SUFFIXES else "gzip"
+
+
+def _open_writer(path: str, codec: str):
+    if codec == "zstd":
+        return _zstandard().ZstdCompressor(level=19).stream_writer(open(path, 'wb'), closefd=True)
+    return gzip.open(path, 'wb', compresslevel=9)
+
+
+def _open_binary(path: str):
+    with open(path, 'rb') as f:
+        magic = f.read(4)
+
+    if magic.startswith(_GZIP_MAGIC):
+        return gzip.open(path, 'rb')
+    if magic == _ZSTD_MAGIC:
+        zstandard = _zstandard()
+        if zstandard is None:
+            raise RuntimeError(f"zstandard is required to read {path}")
+        return zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True)
+    return open(path, 'rb')
@@ -1,27 +1,42 @@
+import fnmatch
 import os
+import re
+import shutil
 import subprocess
 import sys
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import List, Optional, Dict
 
+from utils import deadline, reshard
+from utils.constants import LOGS_PUSH_ATTEMPTS, GIT_COMMAND_TIMEOUT, CHECKIN_HISTORY_LOOKBACK_DAYS
+from utils.log_archive import iter_log_lines, list_segments
+from utils.profiling import profile_entry_point, wall_clock
+
 
 class LogsBranchManager:
     def __init__(self, branch_name: str = "logs"):
         self.branch_name = branch_name
         self.temp_dir = "../temp_logs"
         
-    def _run_git_command(self, command: List[str], check: bool = True) -> subprocess.CompletedProcess:
+    def _run_git_command(self, command: List[str], check: bool = True, timeout: float = GIT_COMMAND_TIMEOUT,
+                         bound_by_deadline: bool = True, text: bool = True) -> subprocess.CompletedProcess:
         try:
-            return subprocess.run(
-                command, 
-                capture_output=True, 
-                text=True, 
-                check=check,
-                cwd=os.getcwd()
-            )
+            with wall_clock('git'):
+                return subprocess.run(
+                    command, 
+                    capture_output=True, 
+                    text=text, 
+                    check=check,
+                    cwd=os.getcwd(),
+                    # Git may use the grace period reserved after the stage deadline.
+                    timeout=deadline.clamp_timeout(timeout, hard=True) if bound_by_deadline else timeout
+                )
         except subprocess.CalledProcessError as e:
             print(f"Git command failed: {' '.join(command)}")
             raise
+        except (subprocess.TimeoutExpired, deadline.DeadlineExceeded):
+            print(f"Git command timed out: {' '.join(command)}")
+            raise
     
     def _branch_exists_remotely(self) -> bool:
         try:
@@ -49,60 +64,51 @@ class LogsBranchManager:
         self._run_git_command(["git", "config", "user.email", email])
     
     def fetch_existing_files(self, file_patterns: List[str]) -> Dict[str, str]:
+        """Copy the files matching the patterns from the logs branch into the temp directory."""
         if not self._branch_exists_remotely():
             return {}
         
         original_cwd = self._change_to_repo_root()
-        fetched_files = {}
         
         try:
             self._run_git_command(["git", "fetch", "origin", f"{self.branch_name}:{self.branch_name}"])
-            
-            current_branch_result = self._run_git_command(["git", "branch", "--show-current"])
-            current_branch = current_branch_result.stdout.strip()
-            
-            self._run_git_command(["git", "checkout", self.branch_name])
             self._ensure_temp_directory()
             
+            # Files are read from the fetched commit instead of a checkout, so the working tree is
+            # never touched and the fetch can run while the stages are busy.
+            listing = self._run_git_command(["git", "ls-tree", "-r", "--name-only", self.branch_name, "--", "logs/"])
+            files = [f.strip() for f in listing.stdout.split('\n') if f.strip()]
+            fetched_files = {}
             for pattern in file_patterns:
-                fetched_files.update(self._fetch_pattern_files(pattern))
-            
-            self._run_git_command(["git", "checkout", current_branch])
+                fetched_files.update(self._fetch_pattern_files(pattern, files))
             return fetched_files
             
         except Exception:
-            self._safe_checkout("main")
             return {}
         finally:
             self._safe_chdir(original_cwd)
     
-    def _fetch_pattern_files(self, pattern: str) -> Dict[str, str]:
+    def _fetch_pattern_files(self, pattern: str, files: List[str]) -> Dict[str, str]:
         fetched = {}
-        try:
-            find_result = self._run_git_command([
-                "git", "ls-files", f"logs/{pattern}"
-            ], check=False)
-            
-            if find_result.returncode == 0:
-                files = [f.strip() for f in find_result.stdout.split('\n') if f.strip()]
-                for file_path in files:
-                    if os.path.exists(file_path):
-                        temp_path = os.path.join(self.temp_dir, os.path.basename(file_path))
-                        self._copy_file(file_path, temp_path)
-                        fetched[os.path.basename(file_path)] = temp_path
-        except Exception:
-            pass
+        for file_path in fnmatch.filter(files, f"logs/{pattern}"):
+            try:
+                blob = self._run_git_command(["git", "show", f"{self.branch_name}:{file_path}"], text=False)
+                temp_path = os.path.join(self.temp_dir, os.path.basename(file_path))
+                with open(temp_path, 'wb') as f:
+                    f.write(blob.stdout)
+                fetched[os.path.basename(file_path)] = temp_path
+            except Exception:
+                pass
         return fetched
     
     def _copy_file(self, src: str, dst: str):
-        with open(src, 'r', encoding='utf-8') as source:
-            content = source.read()
-        with open(dst, 'w', encoding='utf-8') as destination:
-            destination.write(content)
+        # Binary copy so compressed log segments survive the round trip.
+        shutil.copyfile(src, dst)
     
     def _safe_checkout(self, branch: str):
         try:
-            self._run_git_command(["git", "checkout", branch], check=False)
+            # Always allowed to run, so the working tree is never left on the logs branch.
+            self._run_git_command(["git", "checkout", branch], check=False, bound_by_deadline=False)
         except:
             pass
     
@@ -186,7 +192,8 @@ This branch contains automated logs from Genshin Auto Daily actions.
 - Do not manually edit files here
 
 ## Structure:
-- `logs/genshin-checkin.log` - Daily check-in logs
+- `logs/genshin-checkin.log` - Daily check-in logs (most recent segment)
+- `logs/genshin-checkin.log.<timestamp>.gz` - Older check-in log segments, compressed
 - `logs/redeemed_codes.txt` - Cache of redeemed promotion codes
 """
         with open("README.md", 'w', encoding='utf-8') as f:
@@ -269,10 +276,20 @@ This branch contains automated logs from Genshin Auto Daily actions.
             pass
     
     def _push_to_remote(self):
-        try:
-            self._run_git_command(["git", "push", "origin", self.branch_name])
-        except subprocess.CalledProcessError:
+        if not self._branch_exists_remotely():
             self._run_git_command(["git", "push", "--set-upstream", "origin", self.branch_name])
+            return
+
+        # Sharded runners push to the same branch; each writes its own files, so
+        # a rejected push is rebased onto the other runner's commit and retried.
+        for attempt in range(LOGS_PUSH_ATTEMPTS):
+            try:
+                self._run_git_command(["git", "push", "origin", self.branch_name])
+                return
+            except subprocess.CalledProcessError:
+                if attempt == LOGS_PUSH_ATTEMPTS - 1:
+                    raise
+                self._run_git_command(["git", "pull", "--rebase", "origin", self.branch_name])
     
     def _restore_files_from_backup(self, temp_backup_dir: str, original_files: List[str]):
         if not temp_backup_dir or not os.path.exists(temp_backup_dir):
@@ -297,30 +314,95 @@ This branch contains automated logs from Genshin Auto Daily actions.
                 pass
 
 
+def fetch_logs(patterns: List[str]) -> Dict[str, str]:
+    manager = LogsBranchManager()
+    manager.setup_git_config()
+    fetched = manager.fetch_existing_files(patterns)
+    manager.restore_files_to_working_directory(fetched)
+    manager.cleanup_temp_files()
+    reshard.seed_data_files()
+    return fetched
+
+
+def commit_logs(files: List[str]):
+    manager = LogsBranchManager()
+    manager.setup_git_config()
+    manager.commit_and_push_logs(_with_archived_segments(files))
+
+
+def _with_archived_segments(files: List[str]) -> List[str]:
+    expanded = []
+    for file_path in files:
+        expanded.append(file_path)
+        repo_path = os.path.join("..", file_path) if os.path.basename(os.getcwd()) == 'utils' else file_path
+        for segment in list_segments(repo_path):
+            expanded.append(os.path.join(os.path.dirname(file_path), os.path.basename(segment)))
+    return expanded
+
+
+def _history_command(args: List[str]):
+    from utils.checkin_history import CheckinHistory, game_day
+
+    query = args[0] if args else ''
+    month = next((arg for arg in args[1:] if re.fullmatch(r'\d{4}-\d{2}', arg)), None)
+    game = next((arg.lower() for arg in args[1:] if arg.isalpha()), 'genshin')
+    uid = next((arg for arg in args[1:] if arg != month and not arg.isalpha()), None)
+    who = f"account {uid}" if uid else "any account"
+    if game != 'genshin':
+        who += f" ({game})"
+
+    with CheckinHistory() as history:
+        if query == "last":
+            record = history.last_success(uid, game)
+            if record:
+                print(f"Last successful check-in for {who}: {record['day']} "
+                      f"({datetime.fromtimestamp(record['ts'], timezone.utc).strftime('%Y-%m-%d %H:%M:%S UTC')})")
+            else:
+                print(f"No successful check-in recorded for {who} in the last {CHECKIN_HISTORY_LOOKBACK_DAYS} day(s)")
+        elif query == "streak":
+            print(f"Current streak for {who}: {history.streak(uid, game=game)} day(s)")
+        elif query == "gaps":
+            year, month_number = map(int, (month or game_day().strftime('%Y-%m')).split('-'))
+            missed = history.gaps(year, month_number, uid, game=game)
+            print(f"Missed days in {year}-{month_number:02d} for {who}: {len(missed)}")
+            for day in missed:
+                print(f"  - {day.isoformat()}")
+        else:
+            print("Usage: genshin-logs history <last|streak|gaps> [uid] [game] [YYYY-MM]")
+
+
+@profile_entry_point('logs')
 def main():
     if len(sys.argv) < 2:
-        print("Usage: python logs_manager.py <command> [args...]")
+        print("Usage: genshin-logs <command> [args...]")
         print("Commands:")
         print("  fetch <patterns>  - Fetch files matching patterns (e.g., '*.log,*.txt')")
         print("  commit <files>    - Commit files to logs branch (e.g., 'file1.log,file2.txt')")
+        print("  read <file>       - Print a log's full history, including compressed segments")
+        print("  history <query> [uid] [game] [YYYY-MM]")
+        print("                    - Query the check-in history: last, streak or gaps")
         return
     
-    manager = LogsBranchManager()
     command = sys.argv[1]
     
     if command == "fetch":
         patterns = sys.argv[2].split(',') if len(sys.argv) > 2 else ['*.log', '*.txt']
-        
-        manager.setup_git_config()
-        fetched = manager.fetch_existing_files(patterns)
-        manager.restore_files_to_working_directory(fetched)
-        manager.cleanup_temp_files()
+        fetch_logs(patterns)
         
     elif command == "commit":
         files = sys.argv[2].split(',') if len(sys.argv) > 2 else ['genshin-checkin.log', 'redeemed_codes.txt']
+        commit_logs(files)
+        
+    elif command == "read":
+        if len(sys.argv) < 3:
+            print("Usage: genshin-logs read <file>")
+            return
+        
+        for line in iter_log_lines(sys.argv[2]):
+            sys.stdout.write(line)
         
-        manager.setup_git_config()
-        manager.commit_and_push_logs(files)
+    elif command == "history":
+        _history_command(sys.argv[2:])
         
     else:
         print(f"Unknown command: {command}")
@@ -0,0 +1,57 @@
+"""Background fetch of the logs branch for pipelined runs."""
+
+import threading
+from typing import Dict, List, Optional
+
+_lock = threading.Lock()
+_thread: Optional[threading.Thread] = None
+_fetched: Dict[str, str] = {}
+
+
+def start(patterns: List[str]) -> None:
+    global _thread
+    with _lock:
+        if _thread is not None or not patterns:
+            return
+        _thread = threading.Thread(target=_fetch, args=(patterns,), name='logs-prefetch', daemon=True)
+        _thread.start()
+
+
+def pending() -> bool:
+    return _thread is not None
+
+
+# Stages call wait() right before they first touch a data file; it returns at once when no
+# fetch was started.
+def wait() -> Dict[str, str]:
+    """Block until the fetch has finished and its files are in place; returns what was restored."""
+    global _thread
+    with _lock:
+        if _thread is None:
+            return {}
+        _thread.join()
+        _thread = None
+
+        from utils import reshard
+        from utils.logs_manager import LogsBranchManager
+
+        # Restoring happens here, on the waiting thread, so no stage file is
+        # overwritten while the stage still expects its own copy.
+        manager = LogsBranchManager()
+        manager.restore_files_to_working_directory(_fetched)
+        manager.cleanup_temp_files()
+        reshard.seed_data_files()
+        fetched = dict(_fetched)
+        _fetched.clear()
+        return fetched
+
+
+def _fetch(patterns: List[str]) -> None:
+    from utils.logs_manager import LogsBranchManager
+
+    try:
+        manager = LogsBranchManager()
+        manager.setup_git_config()
+        _fetched.update(manager.fetch_existing_files(patterns))
+    except Exception as e:
+        print(f"Fetching logs failed: {e}")
@@ -0,0 +1,207 @@
+"""Per-request timing metrics and run summary exporters"""
+
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+from utils.constants import METRICS_LATENCY_BUCKETS
+
+
+class Histogram:
+    __slots__ = ('buckets', 'counts', 'total', 'count')
+
+    def __init__(self, buckets: Tuple[float, ...] = METRICS_LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.total += value
+        self.count += 1
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+                break
+
+    def cumulative(self):
+        running = 0
+        for bound, count in zip(self.buckets, self.counts):
+            running += count
+            yield bound, running
+
+    def as_dict(self) -> dict:
+        return {
+            'count': self.count,
+            'sum_seconds': round(self.total, 6),
+            'buckets': {str(bound): count for bound, count in self.cumulative()},
+        }
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.started_at = time.time()
+            self._start = time.perf_counter()
+            self.calls: Dict[Tuple[str, str, str], int] = defaultdict(int)
+            self.latency: Dict[str, Histogram] = defaultdict(Histogram)
+            self.attempts: Dict[str, int] = defaultdict(int)
+            self.sleeps: Dict[Tuple[str, str], float] = defaultdict(float)
+            self.sleep_counts: Dict[Tuple[str, str], int] = defaultdict(int)
+            self.info: Dict[str, Any] = {}
+
+    def record_call(self, endpoint: str, status, retcode, latency: float, attempts: int) -> None:
+        retcode_label = '' if retcode is None else str(retcode)
+        with self._lock:
+            self.calls[(endpoint, str(status), retcode_label)] += 1
+            self.latency[endpoint].observe(latency)
+            self.attempts[endpoint] += attempts
+
+    def record_sleep(self, reason: str, seconds: float, endpoint: str = '') -> None:
+        with self._lock:
+            self.sleeps[(reason, endpoint)] += seconds
+            self.sleep_counts[(reason, endpoint)] += 1
+
+    def set_info(self, key: str, value: Any) -> None:
+        with self._lock:
+            self.info[key] = value
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._start
+
+    def summary(self) -> dict:
+        with self._lock:
+            endpoints = {}
+            for (endpoint, status, retcode), count in sorted(self.calls.items()):
+                entry = endpoints.setdefault(endpoint, {'calls': 0, 'outcomes': [], 'attempts': self.attempts[endpoint],
+                                                        'latency': self.latency[endpoint].as_dict()})
+                entry['calls'] += count
+                entry['outcomes'].append({'status': status, 'retcode': retcode or None, 'count': count})
+
+            sleeps = [{'reason': reason, 'endpoint': endpoint or None, 'seconds': round(seconds, 3),
+                       'count': self.sleep_counts[(reason, endpoint)]}
+                      for (reason, endpoint), seconds in sorted(self.sleeps.items())]
+
+            run_seconds = self.elapsed()
+            http_seconds = sum(histogram.total for histogram in self.latency.values())
+            # Backoff sleeps happen inside an HTTP call and are already part of its latency.
+            sleep_seconds = sum(seconds for (reason, _), seconds in self.sleeps.items() if reason != 'backoff')
+            info = dict(self.info)
+
+        return {
+            'started_at': self.started_at,
+            'run_seconds': round(run_seconds, 3),
+            'wall_clock': {
+                'http_seconds': round(http_seconds, 3),
+                'sleep_seconds': round(sleep_seconds, 3),
+                # HTTP time overlaps across threads, so this can go negative in concurrent runs.
+                'other_seconds': round(run_seconds - http_seconds - sleep_seconds, 3),
+            },
+            'endpoints': endpoints,
+            'sleeps': sleeps,
+            'info': info,
+        }
+
+    def to_prometheus(self) -> str:
+        summary = self.summary()
+        lines = [
+            '# HELP genshin_auto_run_duration_seconds Wall-clock duration of the run.',
+            '# TYPE genshin_auto_run_duration_seconds gauge',
+            f'genshin_auto_run_duration_seconds {summary["run_seconds"]}',
+            '# HELP genshin_auto_http_requests_total Outbound HTTP calls by endpoint, status and retcode.',
+            '# TYPE genshin_auto_http_requests_total counter',
+        ]
+        for endpoint, entry in summary['endpoints'].items():
+            for outcome in entry['outcomes']:
+                labels = _labels(endpoint=endpoint, status=outcome['status'], retcode=outcome['retcode'] or '')
+                lines.append(f'genshin_auto_http_requests_total{{{labels}}} {outcome["count"]}')
+
+        lines += [
+            '# HELP genshin_auto_http_attempts_total Transport attempts, including retries.',
+            '# TYPE genshin_auto_http_attempts_total counter',
+        ]
+        lines += [f'genshin_auto_http_attempts_total{{{_labels(endpoint=endpoint)}}} {entry["attempts"]}'
+                  for endpoint, entry in summary['endpoints'].items()]
+
+        lines += [
+            '# HELP genshin_auto_http_request_duration_seconds Call latency including retries.',
+            '# TYPE genshin_auto_http_request_duration_seconds histogram',
+        ]
+        with self._lock:
+            histograms = sorted(self.latency.items())
+        for endpoint, histogram in histograms:
+            for bound, count in histogram.cumulative():
+                lines.append(f'genshin_auto_http_request_duration_seconds_bucket{{{_labels(endpoint=endpoint, le=bound)}}} {count}')
+            lines.append(f'genshin_auto_http_request_duration_seconds_bucket{{{_labels(endpoint=endpoint, le="+Inf")}}} {histogram.count}')
+            lines.append(f'genshin_auto_http_request_duration_seconds_sum{{{_labels(endpoint=endpoint)}}} {histogram.total:.6f}')
+            lines.append(f'genshin_auto_http_request_duration_seconds_count{{{_labels(endpoint=endpoint)}}} {histogram.count}')
+
+        lines += [
+            '# HELP genshin_auto_sleep_seconds_total Time spent sleeping, by reason.',
+            '# TYPE genshin_auto_sleep_seconds_total counter',
+        ]
+        lines += [f'genshin_auto_sleep_seconds_total{{{_labels(reason=sleep["reason"], endpoint=sleep["endpoint"] or "")}}} {sleep["seconds"]}'
+                  for sleep in summary['sleeps']]
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+
+def endpoint_label(url: str) -> str:
+    parts = urlsplit(url)
+    path = parts.path
+    # Webhook URLs carry their secret token in the path.
+    if path.startswith('/api/webhooks'):
+        path = '/api/webhooks'
+    return f"{parts.netloc}{path}"
+
+
+def record_call(url: str, status, retcode, latency: float, attempts: int) -> None:
+    registry.record_call(endpoint_label(url), status, retcode, latency, attempts)
+
+
+def record_sleep(reason: str, seconds: float, url: str = '') -> None:
+    registry.record_sleep(reason, seconds, endpoint_label(url) if url else '')
+
+
+def set_info(key: str, value: Any) -> None:
+    registry.set_info(key, value)
+
+
+def export(directory: Optional[str] = None) -> Optional[Tuple[str, str]]:
+    """Write run-summary.json and a Prometheus textfile to ``directory``."""
+    directory = directory or os.getenv('GENSHIN_AUTO_METRICS_DIR')
+    if not directory:
+        return None
+
+    os.makedirs(directory, exist_ok=True)
+    summary_path = os.path.join(directory, 'run-summary.json')
+    prometheus_path = os.path.join(directory, 'genshin_auto.prom')
+
+    _write_atomic(summary_path, json.dumps(registry.summary(), indent=2))
+    _write_atomic(prometheus_path, registry.to_prometheus())
+    return summary_path, prometheus_path
+
+
+def _labels(**labels) -> str:
+    return ','.join(f'{key}="{_escape(value)}"' for key, value in labels.items())
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _write_atomic(path: str, content: str) -> None:
+    temp_path = path + '.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    os.replace(temp_path, path)
@@ -0,0 +1,25 @@
+"""Locations of the data files synced through the logs branch"""
+
+import os
+from typing import Optional, Tuple
+
+from utils.constants import REPO_ROOT
+
+_shard: Optional[Tuple[int, int]] = None
+
+
+def set_shard(shard: Optional[Tuple[int, int]]) -> None:
+    """Give every data file a per-shard name so parallel runners never touch the same file."""
+    global _shard
+    _shard = shard if shard and shard[1] > 1 else None
+
+
+def data_file_name(file_name: str) -> str:
+    if _shard is None:
+        return file_name
+    base, extension = os.path.splitext(file_name)
+    return f"{base}.shard-{_shard[0]}-of-{_shard[1]}{extension}"
+
+
+def data_path(file_name: str) -> str:
+    return os.path.join(REPO_ROOT, data_file_name(file_name))
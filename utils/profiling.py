@@ -0,0 +1,113 @@
+"""Opt-in CPU and memory profiling for the console-script entry points"""
+
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+
+from utils.constants import REPO_ROOT, PROFILE_TOP_ENTRIES
+
+PROFILE_FLAG = '--profile'
+PROFILE_ENV = 'GENSHIN_AUTO_PROFILE'
+PROFILE_DIR_ENV = 'GENSHIN_AUTO_PROFILE_DIR'
+
+_wall_clock = defaultdict(float)
+_wall_clock_counts = defaultdict(int)
+_wall_clock_lock = threading.Lock()
+
+
+@contextmanager
+def wall_clock(category: str):
+    """Accumulate the wall-clock time spent inside the block under ``category``."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        with _wall_clock_lock:
+            _wall_clock[category] += time.perf_counter() - start
+            _wall_clock_counts[category] += 1
+
+
+def wall_clock_totals() -> dict:
+    with _wall_clock_lock:
+        return {category: {'seconds': round(seconds, 6), 'count': _wall_clock_counts[category]}
+                for category, seconds in _wall_clock.items()}
+
+
+def profile_entry_point(name: str):
+    """Run the decorated ``main`` under cProfile and tracemalloc when profiling is requested."""
+    def decorator(main):
+        @functools.wraps(main)
+        def wrapper(*args, **kwargs):
+            if not _profiling_requested():
+                return main(*args, **kwargs)
+            return _run_profiled(name, main, args, kwargs)
+        return wrapper
+    return decorator
+
+
+def _profiling_requested() -> bool:
+    if PROFILE_FLAG in sys.argv[1:]:
+        sys.argv.remove(PROFILE_FLAG)
+        return True
+    return os.getenv(PROFILE_ENV, '').lower() in ('1', 'true', 'yes')
+
+
+def _run_profiled(name: str, main, args, kwargs):
+    import cProfile
+    import tracemalloc
+
+    directory = os.path.abspath(os.getenv(PROFILE_DIR_ENV) or os.path.join(REPO_ROOT, 'profiles'))
+    os.makedirs(directory, exist_ok=True)
+    report_base = os.path.join(directory, f"{name}-{datetime.now().strftime('%Y%m%d-%H%M%S')}")
+
+    tracemalloc.start(25)
+    start_snapshot = tracemalloc.take_snapshot()
+    profiler = cProfile.Profile()
+    start = time.perf_counter()
+    profiler.enable()
+    try:
+        return main(*args, **kwargs)
+    finally:
+        profiler.disable()
+        elapsed = time.perf_counter() - start
+        end_snapshot = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        _write_reports(report_base, profiler, start_snapshot, end_snapshot, peak, elapsed)
+        print(f"Profile reports written to {report_base}-*")
+
+
+def _write_reports(report_base: str, profiler, start_snapshot, end_snapshot, peak: int, elapsed: float) -> None:
+    import io
+    import pstats
+
+    profiler.dump_stats(f"{report_base}.prof")
+
+    stream = io.StringIO()
+    stats = pstats.Stats(profiler, stream=stream)
+    stats.sort_stats('cumulative').print_stats(PROFILE_TOP_ENTRIES)
+    with open(f"{report_base}-cpu.txt", 'w', encoding='utf-8') as f:
+        f.write(stream.getvalue())
+
+    with open(f"{report_base}-memory.txt", 'w', encoding='utf-8') as f:
+        f.write(f"Peak traced memory: {peak / 1024:.1f} KiB\n\n")
+        f.write(f"Top {PROFILE_TOP_ENTRIES} allocation sites by growth during the run:\n")
+        for stat in end_snapshot.compare_to(start_snapshot, 'lineno')[:PROFILE_TOP_ENTRIES]:
+            f.write(f"{stat}\n")
+
+    from utils import metrics
+
+    wall_clock = metrics.registry.summary()['wall_clock']
+    # git is always reported so runs without git calls still show the category.
+    categories = {'git': {'seconds': 0.0, 'count': 0}, **wall_clock_totals()}
+    categories['http'] = {'seconds': wall_clock['http_seconds']}
+    categories['sleep'] = {'seconds': wall_clock['sleep_seconds']}
+    with open(f"{report_base}-wall.json", 'w', encoding='utf-8') as f:
+        json.dump({'total_seconds': round(elapsed, 6), 'categories': categories}, f, indent=2)
@@ -0,0 +1,87 @@
+"""Seed a shard's data files from other shard layouts after ACCOUNT_SHARDS changes"""
+
+import glob
+import json
+import os
+from typing import List
+
+from utils import paths
+from utils.constants import REDEEMED_CODES_FILE, CHECKIN_HISTORY_FILE, CHECKIN_INDEX_FILE, STATE_FILE, REPO_ROOT
+
+# Caches keyed by account, which a new layout must inherit from the old one.
+SEEDED_FILES = (REDEEMED_CODES_FILE, CHECKIN_HISTORY_FILE, STATE_FILE)
+
+
+def fetch_pattern(file_name: str) -> str:
+    """Pattern matching the file under every shard layout (and unsharded)."""
+    base, extension = os.path.splitext(file_name)
+    return f"{base}*{extension}"
+
+
+def other_layouts(file_name: str) -> List[str]:
+    base, extension = os.path.splitext(file_name)
+    candidates = [os.path.join(REPO_ROOT, file_name)]
+    candidates += sorted(glob.glob(os.path.join(REPO_ROOT, f"{glob.escape(base)}.shard-*-of-*{extension}")))
+    own = paths.data_path(file_name)
+    return [path for path in candidates if path != own and os.path.exists(path)]
+
+
+def seed_data_files() -> List[str]:
+    """Build every missing data file of the current layout from the other layouts; returns the seeded names."""
+    seeded = []
+    for file_name in SEEDED_FILES:
+        target = paths.data_path(file_name)
+        sources = other_layouts(file_name)
+        if os.path.exists(target) or not sources:
+            continue
+        try:
+            _SEEDERS[file_name](sources, target)
+            seeded.append(paths.data_file_name(file_name))
+            print(f"Seeded {paths.data_file_name(file_name)} from {len(sources)} file(s) of other shard layouts")
+        except Exception as e:
+            print(f"Could not seed {paths.data_file_name(file_name)}: {e}")
+            if os.path.exists(target):
+                os.remove(target)
+    return seeded
+
+
+def _merge_lines(sources: List[str], target: str) -> None:
+    lines = {}
+    for source in sources:
+        with open(source, 'r', encoding='utf-8') as f:
+            lines.update((line.strip(), None) for line in f if line.strip())
+    with open(target, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(lines))
+
+
+def _merge_history(sources: List[str], target: str) -> None:
+    lines = {}
+    for source in sources:
+        with open(source, 'r', encoding='utf-8') as f:
+            lines.update((line.rstrip('\n'), None) for line in f if line.strip())
+
+    def timestamp(line: str) -> int:
+        try:
+            return int(json.loads(line).get('ts', 0))
+        except (ValueError, AttributeError, TypeError):
+            return 0
+
+    # The day index needs each day's records together, so the merge is ordered by time.
+    with open(target, 'w', encoding='utf-8') as f:
+        f.writelines(line + '\n' for line in sorted(lines, key=timestamp))
+    index_path = paths.data_path(CHECKIN_INDEX_FILE)
+    if os.path.exists(index_path):
+        os.remove(index_path)
+
+
+def _merge_state(sources: List[str], target: str) -> None:
+    from utils import state
+
+    state.merge_files(sources, target)
+
+
+_SEEDERS = {
+    REDEEMED_CODES_FILE: _merge_lines,
+    CHECKIN_HISTORY_FILE: _merge_history,
+    STATE_FILE: _merge_state,
+}
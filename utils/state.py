@@ -0,0 +1,202 @@
+"""Persistent state shared across runs, kept in one SQLite file on the logs branch."""
+
+import atexit
+import json
+import os
+import threading
+import time
+from typing import Any, List, NamedTuple, Optional
+
+from utils.constants import (STATE_FILE, STATE_SCHEMA_VERSION, STATE_MAX_TTL, CHECKIN_REWARDS_FILE, GAME_ROLES_FILE,
+                             NOTIFY_LEDGER_FILE, GAME_ROLES_TTL, NOTIFY_LEDGER_RETENTION, USER_STATS_TTL, WIKI_CODES_TTL)
+from utils.paths import data_file_name, data_path
+
+
+class Namespace(NamedTuple):
+    name: str
+    kind: type  # type every value must have
+    ttl: Optional[float] = STATE_MAX_TTL  # default lifetime of an entry, in seconds
+
+
+CHECKIN_CALENDARS = Namespace('checkin_calendars', dict, 45 * 86400)
+CHECKIN_SIGN_DAYS = Namespace('checkin_sign_days', dict, 45 * 86400)
+# Role lists are kept well past GAME_ROLES_TTL so a stale one can stand in during an outage.
+GAME_ROLES = Namespace('game_roles', dict, 4 * GAME_ROLES_TTL)
+NOTIFICATIONS = Namespace('notifications', dict, NOTIFY_LEDGER_RETENTION)
+USER_STATS = Namespace('user_stats', dict, USER_STATS_TTL)
+WIKI_CODES = Namespace('wiki_codes', list, WIKI_CODES_TTL)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    expires REAL,
+    PRIMARY KEY (namespace, key)
+) WITHOUT ROWID
+"""
+
+# Caches that lived in their own JSON files before the state store, imported when it is first created.
+_LEGACY_FILES = (
+    (CHECKIN_REWARDS_FILE, lambda data: [(CHECKIN_CALENDARS, data.get('calendars', {})),
+                                           (CHECKIN_SIGN_DAYS, data.get('accounts', {}))]),
+    (GAME_ROLES_FILE, lambda data: [(GAME_ROLES, data)]),
+    (NOTIFY_LEDGER_FILE, lambda data: [(NOTIFICATIONS, data)]),
+)
+
+_lock = threading.RLock()
+_db = None
+_dirty = False
+_save_at_exit = False
+
+
+def get(namespace: Namespace, key: str, default: Any = None) -> Any:
+    with _lock:
+        row = _connection().execute("SELECT value, expires FROM entries WHERE namespace = ? AND key = ?",
+                                    (namespace.name, key)).fetchone()
+    if row is None or (row[1] is not None and row[1] <= time.time()):
+        return default
+    return json.loads(row[0])
+
+
+def put(namespace: Namespace, key: str, value: Any, ttl: Optional[float] = None) -> None:
+    """Store ``value`` for ``ttl`` seconds (the namespace default when omitted)."""
+    global _dirty
+    if not isinstance(value, namespace.kind):
+        raise TypeError(f"State namespace {namespace.name} holds {namespace.kind.__name__}, "
+                        f"not {type(value).__name__}")
+    ttl = namespace.ttl if ttl is None else ttl
+    expires = time.time() + ttl if ttl is not None else None
+    encoded = json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+    with _lock:
+        _connection().execute("INSERT OR REPLACE INTO entries (namespace, key, value, expires) VALUES (?, ?, ?, ?)",
+                              (namespace.name, key, encoded, expires))
+        _dirty = True
+
+
+def save() -> bool:
+    """Write the state back atomically if it changed; returns whether a file was written."""
+    global _dirty
+    import sqlite3
+
+    with _lock:
+        if _db is None or not _dirty:
+            return False
+        _db.execute("DELETE FROM entries WHERE expires IS NOT NULL AND expires <= ?", (time.time(),))
+        _db.commit()
+
+        path = data_path(STATE_FILE)
+        temp_path = path + '.tmp'
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        target = sqlite3.connect(temp_path)
+        try:
+            _db.backup(target)
+            target.execute(f"PRAGMA user_version = {STATE_SCHEMA_VERSION}")
+            target.execute("VACUUM")
+            target.commit()
+        finally:
+            target.close()
+        os.replace(temp_path, path)
+        _dirty = False
+        return True
+
+
+def reset() -> None:
+    """Forget the loaded state without saving it (the next access loads the file again)."""
+    global _db, _dirty
+    with _lock:
+        if _db is not None:
+            _db.close()
+        _db = None
+        _dirty = False
+
+
+def merge_files(sources: List[str], target: str) -> None:
+    """Write ``target`` with the entries of every source file, keeping the longest-lived copy of a key."""
+    import sqlite3
+
+    merged = sqlite3.connect(target)
+    try:
+        merged.execute(_SCHEMA)
+        for source in sources:
+            merged.execute("ATTACH DATABASE ? AS source", (source,))
+            try:
+                version = merged.execute("PRAGMA source.user_version").fetchone()[0]
+                if version != STATE_SCHEMA_VERSION:
+                    print(f"Ignoring state file {os.path.basename(source)} with schema version {version}")
+                    continue
+                merged.execute("""
+                    INSERT INTO entries SELECT namespace, key, value, expires FROM source.entries WHERE true
+                    ON CONFLICT (namespace, key) DO UPDATE SET value = excluded.value, expires = excluded.expires
+                    WHERE excluded.expires IS NULL OR (entries.expires IS NOT NULL AND excluded.expires > entries.expires)
+                """)
+                merged.commit()
+            finally:
+                merged.execute("DETACH DATABASE source")
+        merged.execute(f"PRAGMA user_version = {STATE_SCHEMA_VERSION}")
+        merged.commit()
+    finally:
+        merged.close()
+
+
+def _connection():
+    if _db is None:
+        _load()
+    return _db
+
+
+# The file is copied into memory on first use, after a pipelined logs fetch has landed, and
+# written back atomically by save(): the runner saves before committing the logs branch,
+# stand-alone scripts at exit. A file with another schema version is ignored.
+def _load():
+    global _db, _save_at_exit
+    import sqlite3
+    from utils import logs_prefetch
+
+    # The state file is one of the files synced through the logs branch.
+    logs_prefetch.wait()
+    _db = sqlite3.connect(':memory:', check_same_thread=False)
+    path = data_path(STATE_FILE)
+    created = not os.path.exists(path)
+    if not created:
+        try:
+            source = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+            try:
+                version = source.execute("PRAGMA user_version").fetchone()[0]
+                if version == STATE_SCHEMA_VERSION:
+                    source.backup(_db)
+                else:
+                    print(f"Ignoring state file with schema version {version} (expected {STATE_SCHEMA_VERSION})")
+            finally:
+                source.close()
+        except sqlite3.DatabaseError as e:
+            print(f"Ignoring unreadable state file: {e}")
+            _db.close()
+            _db = sqlite3.connect(':memory:', check_same_thread=False)
+    _db.execute(_SCHEMA)
+    if created:
+        _import_legacy_files()
+
+    if not _save_at_exit:
+        atexit.register(save)
+        _save_at_exit = True
+    return _db
+
+
+def _import_legacy_files() -> None:
+    for file_name, convert in _LEGACY_FILES:
+        path = data_path(file_name)
+        if not os.path.exists(path):
+            continue
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            for namespace, entries in convert(data):
+                for key, value in entries.items():
+                    if get(namespace, key) is None:
+                        put(namespace, key, value)
+            os.remove(path)
+            print(f"Moved {file_name} into {data_file_name(STATE_FILE)}")
+        except (OSError, ValueError, TypeError, AttributeError) as e:
+            print(f"Could not import {file_name}: {e}")
@@ -1,25 +1,38 @@
 import os
-from typing import Dict, Optional
+from typing import TYPE_CHECKING, Dict, Optional
 
-import requests
+from utils import http_client, state
+from utils.constants import USER_STATS_API_URL, DEFAULT_HEADERS
+
+if TYPE_CHECKING:
+    from utils.accounts import Account
 
-try:
-    from constants import USER_STATS_API_URL, DEFAULT_HEADERS
-except ImportError:
-    USER_STATS_API_URL = "https://bbs-api-os.hoyolab.com/game_record/genshin/api/index"
-    DEFAULT_HEADERS = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-    }
 
+def get_user_stats(account: Optional['Account'] = None) -> Optional[Dict]:
+    """Stats of the account's role, or of its cookie's main role when no UID/region is configured."""
+    if account is not None:
+        server, role_id, cookie = account.region, account.uid, account.cookie
+    else:
+        server = os.getenv('REGION')
+        role_id = os.getenv('UID')
+        cookie = os.getenv('COOKIE')
+    
+    if cookie and not (server and role_id):
+        from utils.accounts import Account
+        from utils.game_roles import primary_role
 
-def get_user_stats() -> Optional[Dict]:
-    server = os.getenv('REGION')
-    role_id = os.getenv('UID')
-    cookie = os.getenv('COOKIE')
+        role = primary_role(Account(uid='', region='', cookie=cookie))
+        if role is not None:
+            server, role_id = role.region, role.uid
     
     if not all([server, role_id, cookie]):
         return None
     
+    cache_key = f"{server}:{role_id}"
+    cached = state.get(state.USER_STATS, cache_key)
+    if cached is not None:
+        return cached
+    
     params = {
         'server': server,
         'role_id': role_id
@@ -28,13 +41,15 @@ def get_user_stats() -> Optional[Dict]:
     headers = {**DEFAULT_HEADERS, 'Cookie': cookie}
     
     try:
-        response = requests.get(USER_STATS_API_URL, params=params, headers=headers)
+        response = http_client.get(USER_STATS_API_URL, params=params, headers=headers)
         response.raise_for_status()
         
         data = response.json()
         
         if data.get('retcode') == 0 and data.get('message') == 'OK':
             role_data = data.get('data', {}).get('role')
+            if role_data:
+                state.put(state.USER_STATS, cache_key, role_data)
             return role_data if role_data else None
         
         return None